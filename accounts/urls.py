@@ -1,7 +1,7 @@
 from django.contrib.auth.decorators import login_required
 from django.urls import include, path
 
-from accounts.views import FavoriteView, WatchlistView
+from accounts.views import FavoriteView, RecommendedView, WatchlistView
 
 urlpatterns = [
     path("", include("allauth.urls")),
@@ -11,4 +11,9 @@ urlpatterns = [
     path(
         "user/watchlist", login_required(WatchlistView.as_view()), name="user_watchlist"
     ),
+    path(
+        "user/recommended",
+        login_required(RecommendedView.as_view()),
+        name="user_recommended",
+    ),
 ]
@@ -3,41 +3,62 @@ from typing import Any
 from django.db.models import QuerySet
 from django_filters.views import FilterView
 
-from accounts.models import Profile
+from movies.services.collaborative import get_user_recommended_ids
 from movies.services.filters import MovieFilter
+from movies.services.query_builder import MovieQueryBuilder
+from movies.services.services import get_movies_by_ids
+from movies.services.user_lists import get_user_movie_ids
 
 
 class BaseProfileView(FilterView):
     """Base User Watchlist & Favorites view."""
 
     page_title = ""
+    list_name = ""
     filterset_class = MovieFilter
     paginate_by = 30
     template_name = "movies/movie_list.html"
 
+    def get_queryset(self) -> QuerySet:
+        query_builder = MovieQueryBuilder(
+            filter_by={"pk__in": self.get_movie_ids()},
+            order_by=["-imdb_votes", "-id"],
+            distinct=False,
+        )
+        return query_builder.build_queryset()
+
     def get_context_data(self, **kwargs: Any) -> dict:
         context = super().get_context_data(**kwargs)
-        context[
-            "page_title"
-        ] = f"{self.page_title} ({self.get_queryset().count()} items)"
+        context["page_title"] = f"{self.page_title} ({len(self.get_movie_ids())} items)"
         return context
 
+    def get_movie_ids(self) -> frozenset[int]:
+        return get_user_movie_ids(self.request.user, self.list_name)  # type: ignore
+
 
 class WatchlistView(BaseProfileView):
     """User Watchlist view."""
 
     page_title = "My Watchlist"
-
-    def get_queryset(self) -> QuerySet:
-        user = self.request.user
-        return Profile.objects.get(user=user).watchlist
+    list_name = "watchlist"
 
 
 class FavoriteView(BaseProfileView):
     """User Favorite view."""
 
     page_title = "My Favorites"
+    list_name = "favorites"
+
+
+class RecommendedView(BaseProfileView):
+    """Movies recommended to the user by rates, likes and lists of similar users."""
+
+    page_title = "Recommended for You"
 
     def get_queryset(self) -> QuerySet:
-        user = self.request.user
-        return Profile.objects.get(user=user).favorites
+        return get_movies_by_ids(self.get_movie_ids())
+
+    def get_movie_ids(self) -> list[int]:  # type: ignore
+        if not hasattr(self, "_movie_ids"):
+            self._movie_ids = get_user_recommended_ids(self.request.user.pk)
+        return self._movie_ids
@@ -0,0 +1,39 @@
+from typing import Any, Callable
+
+import logging
+import threading
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(func: Callable, *args: Any, **kwargs: Any) -> None:
+    """
+    Run function in a daemon thread of the current worker.
+    DB connection opened by the thread is closed once it's finished.
+    """
+
+    threading.Thread(target=_wrap(func, *args, **kwargs), daemon=True).start()
+
+
+def run_later(
+    delay: float, func: Callable, *args: Any, **kwargs: Any
+) -> threading.Timer:
+    """Same as `run_in_background`, but the function is started after delay."""
+
+    timer = threading.Timer(delay, _wrap(func, *args, **kwargs))
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def _wrap(func: Callable, *args: Any, **kwargs: Any) -> Callable[[], None]:
+    def target() -> None:
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            connections.close_all()
+
+    return target
@@ -0,0 +1,47 @@
+from typing import Any, Callable, Iterable
+
+import statistics
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    timings: list[float]
+
+    @property
+    def qps(self) -> float:
+        total = sum(self.timings)
+        return len(self.timings) / total if total else 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return statistics.fmean(self.timings) * 1000 if self.timings else 0.0
+
+    @property
+    def p95_ms(self) -> float:
+        if len(self.timings) < 2:
+            return self.avg_ms
+        return statistics.quantiles(self.timings, n=20)[-1] * 1000
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<32} {self.qps:>10.1f} QPS  "
+            f"avg {self.avg_ms:>8.2f} ms  p95 {self.p95_ms:>8.2f} ms"
+        )
+
+
+def run_benchmark(
+    name: str, func: Callable[[Any], Any], inputs: Iterable[Any]
+) -> BenchmarkResult:
+    """
+    Call function with every input and collect timings of each call.
+    """
+
+    timings = []
+    for item in inputs:
+        started_at = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - started_at)
+    return BenchmarkResult(name=name, timings=timings)
@@ -0,0 +1,88 @@
+from typing import Iterable
+
+from cacheops.redis import redis_client
+from django.db import transaction
+from redis.exceptions import ResponseError
+
+from common.cache.redis import make_key
+
+# Workers read the log at most this often, it's how long they may lag.
+SYNC_INTERVAL = 1
+# Approximate number of logged changes kept for workers lagging behind.
+MAX_LENGTH = 10000
+INITIAL_POSITION = "0-0"
+
+
+class ChangeLog:
+    """
+    Ids of changed objects logged to a Redis stream, so every worker keeps
+    its in-process copy of data (search or filter index) up to date, not only
+    the one that handled the write. A copy remembers the log position it was
+    built at and replays later changes. If some of them were trimmed from
+    the log (or all copies were reset), the copy has to be rebuilt.
+    """
+
+    def __init__(self, name: str, max_length: int = MAX_LENGTH) -> None:
+        self.key = make_key("changes", name)
+        self.max_length = max_length
+
+    def add(self, ids: Iterable[int]) -> None:
+        """Log ids once the current transaction is committed."""
+
+        ids = sorted(set(ids))
+        if ids:
+            transaction.on_commit(
+                lambda: self._append({"ids": ",".join(str(pk) for pk in ids)})
+            )
+
+    def reset(self) -> None:
+        """Make all copies rebuilt, for changes of unknown objects."""
+
+        transaction.on_commit(lambda: self._append({"reset": 1}))
+
+    def get_position(self) -> str:
+        """Position to replay changes from for a copy built from now on."""
+
+        try:
+            info = redis_client.xinfo_stream(self.key)
+        except ResponseError:
+            # No changes logged yet.
+            return INITIAL_POSITION
+        return info["last-generated-id"].decode()
+
+    def read(self, position: str) -> tuple[str, set[int]] | None:
+        """
+        Ids changed after `position` and the position of the last change,
+        None if the copy at `position` must be rebuilt.
+        """
+
+        with redis_client.pipeline() as pipeline:
+            pipeline.xrange(self.key, min=f"({position}")
+            pipeline.xinfo_stream(self.key)
+            try:
+                entries, info = pipeline.execute()
+            except ResponseError:
+                # Log expired or Redis was flushed, changes could be lost.
+                return (position, set()) if position == INITIAL_POSITION else None
+
+        trimmed_position = info["max-deleted-entry-id"].decode()
+        last_position = info["last-generated-id"].decode()
+        if _parse_position(trimmed_position) > _parse_position(position):
+            return None
+        if _parse_position(position) > _parse_position(last_position):
+            # The log was recreated after the copy was built.
+            return None
+
+        ids: set[int] = set()
+        for _, fields in entries:
+            if b"reset" in fields:
+                return None
+            ids.update(int(pk) for pk in fields[b"ids"].split(b","))
+        return last_position, ids
+
+    def _append(self, fields: dict) -> None:
+        redis_client.xadd(self.key, fields, maxlen=self.max_length, approximate=True)
+
+
+def _parse_position(position: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in position.split("-"))
@@ -0,0 +1,205 @@
+from typing import Any, Iterable
+
+import json
+import logging
+import os
+import threading
+import time
+from cacheops.redis import redis_client
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from redis.exceptions import RedisError
+
+from common.cache.redis import make_key
+from config.settings.base import (
+    LOCAL_CACHE_ENABLED,
+    LOCAL_CACHE_MAX_SIZE,
+    LOCAL_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = make_key("tag", "invalidations")
+RECONNECT_DELAY = 5
+
+MISSING = object()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    tags: tuple[str, ...]
+    expires_at: float
+
+
+class LocalCache:
+    """
+    Per-worker LRU of cached values with TTL, bounded by the total size in
+    bytes (size of the pickled value, as stored in Redis). Values are shared
+    between threads of the worker and must be treated as read-only.
+
+    Entries are evicted by tags: invalidations of all workers come through
+    Redis pub/sub (see `get_local_cache`).
+    """
+
+    def __init__(
+        self, max_size: int = LOCAL_CACHE_MAX_SIZE, ttl: int = LOCAL_CACHE_TTL
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._size = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._tag_keys: dict[str, set[str]] = {}
+        self._generations: Counter = Counter()
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Any:
+        """Cached value or `MISSING`."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def get_generation(self, tags: Iterable[str]) -> tuple[int, ...]:
+        """
+        Invalidation counters of tags, taken before the value is read from
+        Redis or built, and passed to `set`.
+        """
+
+        with self._lock:
+            return (self._epoch, *(self._generations[tag] for tag in tags))
+
+    def set(
+        self, key: str, value: Any, size: int, tags: tuple[str, ...], generation: tuple
+    ) -> None:
+        """
+        Store the value unless its tags were invalidated since `generation`
+        was taken: the value could be read from Redis before invalidation.
+        """
+
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            if generation != (self._epoch, *(self._generations[tag] for tag in tags)):
+                return
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _Entry(value, size, tags, time.monotonic() + self.ttl)
+            self._size += size
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+
+            while self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+                for key in self._tag_keys.pop(tag, set()):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._size = 0
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        for tag in entry.tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+def publish_invalidation(pipeline: Any, tags: Iterable[str]) -> None:
+    """Add notification of invalidated tags for local caches to the pipeline."""
+
+    pipeline.publish(INVALIDATION_CHANNEL, json.dumps(list(tags)))
+
+
+_cache = LocalCache()
+_listener_pid: int | None = None
+_listener_ready = threading.Event()
+_listener_lock = threading.Lock()
+
+
+def get_local_cache() -> LocalCache | None:
+    """
+    Local cache of the current worker, None when it's disabled or when
+    invalidations can't be received (not subscribed yet or disconnected).
+    Listener thread is started on the first use in each forked worker.
+    """
+
+    global _listener_pid  # noqa: WPS420
+
+    if not LOCAL_CACHE_ENABLED:
+        return None
+
+    if _listener_pid != os.getpid():
+        with _listener_lock:
+            if _listener_pid != os.getpid():
+                _listener_ready.clear()
+                _cache.clear()
+                threading.Thread(
+                    target=_listen, name="local-cache-invalidations", daemon=True
+                ).start()
+                _listener_pid = os.getpid()
+
+    if not _listener_ready.is_set():
+        return None
+    return _cache
+
+
+def invalidate_local_cache(tags: Iterable[str]) -> None:
+    """Evict tags in the current worker without waiting for the notification."""
+
+    _cache.invalidate(tags)
+
+
+def _listen() -> None:
+    """Evict entries of invalidated tags, reconnecting on Redis failures."""
+
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages could be missed while disconnected.
+            _cache.clear()
+            _listener_ready.set()
+            while True:
+                message = pubsub.get_message(timeout=1)
+                if message is not None:
+                    _cache.invalidate(json.loads(message["data"]))
+        except (RedisError, OSError, ValueError) as e:
+            logger.warning(f"Local cache invalidations are not received: {e}")
+        finally:
+            _listener_ready.clear()
+            _cache.clear()
+            pubsub.close()
+        time.sleep(RECONNECT_DELAY)
@@ -0,0 +1,22 @@
+from typing import Any
+
+from cacheops.redis import redis_client
+
+from config.settings.base import DEPLOY_ENVIRONMENT
+
+LOCK_TIMEOUT = 60
+
+
+def make_key(*parts: Any) -> str:
+    """Redis key, prefixed by environment the same way as cacheops keys."""
+
+    return ":".join(str(part) for part in (DEPLOY_ENVIRONMENT or "", *parts))
+
+
+def get_lock(name: str, timeout: int = LOCK_TIMEOUT) -> Any:
+    """
+    Distributed non-blocking lock, must be released in the thread
+    that acquired it.
+    """
+
+    return redis_client.lock(make_key("lock", name), timeout=timeout, blocking=False)
@@ -0,0 +1,187 @@
+from typing import Any, Callable
+
+import functools
+import logging
+import math
+import random
+import threading
+import time
+from cacheops import CacheMiss, cache
+from hashlib import md5
+from redis.exceptions import LockNotOwnedError
+
+from common.background import run_in_background
+from common.cache.redis import LOCK_TIMEOUT, get_lock
+
+logger = logging.getLogger(__name__)
+
+# Outdated value is still served for this long after its refresh is due.
+STALE_TTL_FACTOR = 4
+# Early refresh eagerness (XFetch beta), 1 is optimal for most values.
+EARLY_REFRESH_BETA = 1.0
+# Workers missing a value wait this long for the one that builds it.
+BUILD_WAIT_TIMEOUT = 10
+BUILD_WAIT_INTERVAL = 0.05
+# Build lock outlives the last build duration this many times.
+LOCK_TIMEOUT_FACTOR = 3
+
+# Keys refreshed in background by the current worker.
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+def get_or_refresh(
+    key: str, build: Callable[[], Any], ttl: int, invalidation_key: str | None = None
+) -> Any:
+    """
+    Get value built by `build`, stored with its build time and duration.
+    Missing value is built by a single worker, the others wait for it.
+    Outdated or invalidated value is served as is and rebuilt in background
+    by a single worker (stale-while-revalidate).
+
+    Value is refreshed a bit before it's due, with probability growing
+    as the due time gets closer and the build gets longer (XFetch), so
+    popular values are rebuilt before they become outdated.
+    `invalidation_key` lets one `invalidate` call outdate a group of values.
+    """
+
+    try:
+        value, built_at, duration = cache.get(key)
+    except (CacheMiss, ValueError):
+        return refresh(key, build, ttl)
+
+    chance = random.random() or 1e-12  # noqa: S311
+    early_by = -duration * EARLY_REFRESH_BETA * math.log(chance)
+    invalidated_at = _get_invalidated_at(invalidation_key or key)
+    if time.time() + early_by - built_at > ttl or built_at < invalidated_at:
+        lock_timeout = max(LOCK_TIMEOUT, math.ceil(duration * LOCK_TIMEOUT_FACTOR))
+        _refresh_in_background(key, build, ttl, lock_timeout)
+    return value
+
+
+def refresh(
+    key: str,
+    build: Callable[[], Any],
+    ttl: int,
+    only_if_locked: bool = False,
+    lock_timeout: int = LOCK_TIMEOUT,
+) -> Any:
+    """
+    Build value and store it.
+    Concurrent builds are avoided with a lock: with `only_if_locked` nothing is
+    done if another worker holds it, otherwise the value built by that worker
+    is returned once it's stored. If it isn't stored in time, the value is
+    built but not stored.
+    """
+
+    lock = get_lock(key, timeout=lock_timeout)
+    locked = lock.acquire()
+    if not locked and only_if_locked:
+        return None
+    if not locked:
+        try:
+            return _wait_for_build(key, lock)
+        except (CacheMiss, ValueError):
+            pass
+
+    try:
+        started_at = time.time()
+        value = build()
+        if locked:
+            duration = time.time() - started_at
+            cache.set(key, (value, started_at, duration), ttl * STALE_TTL_FACTOR)
+            logger.info(f"`{key}` refreshed in {duration:.2f}s.")
+    finally:
+        if locked:
+            _release_lock(key, lock)
+
+    return value
+
+
+def invalidate(key: str, ttl: int) -> None:
+    """Mark value (or group of values) as outdated, rebuilt on the next access."""
+
+    cache.set(f"{key}:invalidated", time.time(), timeout=ttl * STALE_TTL_FACTOR)
+
+
+def cached_refresh(name: str, ttl: int) -> Callable:
+    """
+    Cache function result with `get_or_refresh`, keyed by its arguments.
+    A replacement of cacheops `cached` for heavy results: expiration doesn't
+    cause concurrent rebuilds, and `invalidate(name, ttl)` outdates results
+    for all arguments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            arguments = repr((args, sorted(kwargs.items()))).encode("utf-8")
+            key = f"{name}:{md5(arguments).hexdigest()}"
+            return get_or_refresh(
+                key,
+                functools.partial(func, *args, **kwargs),
+                ttl,
+                invalidation_key=name,
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def _refresh_in_background(
+    key: str, build: Callable[[], Any], ttl: int, lock_timeout: int
+) -> None:
+    """
+    Start a refresh unless this worker already runs one for the key,
+    so stale hits don't start a thread each.
+    """
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    try:
+        run_in_background(_refresh_once, key, build, ttl, lock_timeout)
+    except RuntimeError:
+        # Thread can't be started, the next stale hit tries again.
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        raise
+
+
+def _refresh_once(
+    key: str, build: Callable[[], Any], ttl: int, lock_timeout: int
+) -> None:
+    try:
+        refresh(key, build, ttl, only_if_locked=True, lock_timeout=lock_timeout)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _release_lock(key: str, lock: Any) -> None:
+    try:
+        lock.release()
+    except LockNotOwnedError:
+        # The build took longer than the lock timeout, so another worker
+        # could build the value at the same time. The value is stored anyway.
+        logger.warning(f"`{key}` build outlived its lock.")
+
+
+def _wait_for_build(key: str, lock: Any) -> Any:
+    """Value stored by the worker holding the lock, `CacheMiss` on timeout."""
+
+    deadline = time.monotonic() + BUILD_WAIT_TIMEOUT
+    while lock.locked() and time.monotonic() < deadline:
+        time.sleep(BUILD_WAIT_INTERVAL)
+    value, _, _ = cache.get(key)
+    return value
+
+
+def _get_invalidated_at(key: str) -> float:
+    try:
+        return cache.get(f"{key}:invalidated")
+    except CacheMiss:
+        return 0
@@ -0,0 +1,198 @@
+from typing import Any, Callable, Iterable
+
+import functools
+import pickle
+import threading
+import time
+from cacheops.redis import redis_client
+from collections import Counter
+from django.db import transaction
+from hashlib import md5
+
+from common.cache.local import (
+    MISSING,
+    get_local_cache,
+    invalidate_local_cache,
+    publish_invalidation,
+)
+from common.cache.redis import make_key
+from config.settings.base import SESSION_SPECIAL_CACHE_TTL
+
+METRICS_KEY = make_key("cache-metrics")
+METRICS_FLUSH_INTERVAL = 10
+
+_metrics: Counter = Counter()
+_metrics_flushed_at = time.monotonic()
+_metrics_lock = threading.Lock()
+
+
+def cached_with_tags(
+    name: str,
+    tags: Callable[..., Iterable[str]],
+    timeout: int = SESSION_SPECIAL_CACHE_TTL,
+    local: bool = True,
+) -> Callable:
+    """
+    Cache function result until any of its tags is invalidated.
+    `tags` gets the function arguments and returns entities the result depends
+    on, e.g. `lambda slug: ["movies", f"genre:{slug}"]`.
+
+    Result is stored with versions of its tags, read before the build, and
+    served while they are unchanged. Entry and versions are read by one MGET.
+
+    With `local`, results are also kept in the per-worker cache in front of
+    Redis (for small hot results shared by many requests).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = _get_entry_key(name, args, kwargs)
+            result_tags = tuple(sorted(set(tags(*args, **kwargs))))
+            local_cache = get_local_cache() if local else None
+            if local_cache is not None:
+                value = local_cache.get(key)
+                if value is not MISSING:
+                    _count(f"{name}:local_hits")
+                    return value
+                generation = local_cache.get_generation(result_tags)
+
+            entry, *versions = redis_client.mget(
+                key, *(_get_tag_key(tag) for tag in result_tags)
+            )
+
+            if entry is not None and None not in versions:
+                entry_versions, value = pickle.loads(entry)
+                if entry_versions == versions:
+                    _count(f"{name}:hits")
+                    if local_cache is not None:
+                        local_cache.set(key, value, len(entry), result_tags, generation)
+                    return value
+                _count(f"{name}:stale")
+            else:
+                _count(f"{name}:misses")
+
+            if None in versions:
+                versions = _init_versions(result_tags)
+
+            value = func(*args, **kwargs)
+            entry = pickle.dumps((versions, value), -1)
+            with redis_client.pipeline(transaction=False) as pipeline:
+                pipeline.set(key, entry, ex=timeout)
+                for tag in result_tags:
+                    pipeline.pfadd(_get_dependents_key(tag), key)
+                    pipeline.expire(_get_dependents_key(tag), timeout)
+                pipeline.execute()
+            if local_cache is not None:
+                local_cache.set(key, value, len(entry), result_tags, generation)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tags(*tags: str) -> int:
+    """
+    Outdate results depending on any of the tags. Returns estimated number
+    of affected entries (invalidation fan-out).
+    """
+
+    tags = tuple(set(tags))
+    if not tags:
+        return 0
+
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for tag in tags:
+            pipeline.incr(_get_tag_key(tag))
+            pipeline.pfcount(_get_dependents_key(tag))
+            pipeline.delete(_get_dependents_key(tag))
+        publish_invalidation(pipeline, tags)
+        results = pipeline.execute()[:-1]
+
+    invalidate_local_cache(tags)
+
+    fanout = sum(results[1::3])
+    for tag, tag_fanout in zip(tags, results[1::3]):
+        group = tag.split(":", 1)[0]
+        _count(f"tag:{group}:invalidations")
+        _count(f"tag:{group}:fanout", tag_fanout)
+    return fanout
+
+
+def invalidate_tags_on_commit(*tags: str) -> None:
+    """
+    Invalidate tags once the current transaction is committed, so a
+    concurrent reader can't cache the old data under the new tag versions.
+    """
+
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def get_cache_metrics() -> dict[str, int]:
+    """
+    Counters of all workers: local hits/hits/misses/stale per cache,
+    fan-out per tag.
+    """
+
+    flush_cache_metrics()
+    metrics = redis_client.hgetall(METRICS_KEY)
+    return {field.decode(): int(value) for field, value in metrics.items()}
+
+
+def reset_cache_metrics() -> None:
+    redis_client.delete(METRICS_KEY)
+
+
+def flush_cache_metrics() -> None:
+    """Write counters collected by this worker to Redis."""
+
+    global _metrics_flushed_at  # noqa: WPS420
+
+    with _metrics_lock:
+        metrics = dict(_metrics)
+        _metrics.clear()
+        _metrics_flushed_at = time.monotonic()
+
+    if metrics:
+        with redis_client.pipeline(transaction=False) as pipeline:
+            for field, value in metrics.items():
+                pipeline.hincrby(METRICS_KEY, field, value)
+            pipeline.execute()
+
+
+def _count(field: str, value: int = 1) -> None:
+    """Count in-process, counters are written to Redis in batches."""
+
+    with _metrics_lock:
+        _metrics[field] += value
+        should_flush = time.monotonic() - _metrics_flushed_at > METRICS_FLUSH_INTERVAL
+    if should_flush:
+        flush_cache_metrics()
+
+
+def _get_entry_key(name: str, args: tuple, kwargs: dict) -> str:
+    arguments = md5(repr((args, sorted(kwargs.items()))).encode("utf-8")).hexdigest()
+    return make_key("tagged", name, arguments)
+
+
+def _get_tag_key(tag: str) -> str:
+    return make_key("tag", tag)
+
+
+def _get_dependents_key(tag: str) -> str:
+    return make_key("tag", tag, "dependents")
+
+
+def _init_versions(tags: tuple[str, ...]) -> list[bytes]:
+    """
+    Start missing tag versions from the current time, so a version that
+    was evicted never matches versions stored with older entries.
+    """
+
+    initial = time.time_ns()
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for tag in tags:
+            pipeline.set(_get_tag_key(tag), initial, nx=True)
+        pipeline.mget(*(_get_tag_key(tag) for tag in tags))
+        return pipeline.execute()[-1]
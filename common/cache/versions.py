@@ -0,0 +1,82 @@
+from typing import Callable, Iterable
+
+from cacheops.redis import redis_client
+from django.contrib.messages import get_messages
+from django.db import transaction
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse
+from hashlib import md5
+
+from common.cache.redis import make_key
+from config.settings.base import SESSION_CACHE_TTL
+
+PAGE_CACHE_TTL = SESSION_CACHE_TTL * 4
+
+
+def get_version_key(model: type[Model], pk: int) -> str:
+    return make_key("version", model._meta.label_lower, pk)  # noqa: WPS437
+
+
+def bump_versions(model: type[Model], pks: Iterable[int]) -> None:
+    """
+    Increment content versions of the objects, so everything cached
+    for previous versions becomes outdated. Versions are bumped once the
+    current transaction is committed: bumped earlier, a concurrent reader
+    could cache the old content under the new version.
+    """
+
+    keys = [get_version_key(model, pk) for pk in set(pks)]
+    if keys:
+        transaction.on_commit(lambda: _incr_versions(keys))
+
+
+def cached_anonymous_page(
+    request: HttpRequest,
+    model: type[Model],
+    pk: int,
+    render: Callable[[], HttpResponse],
+    allowed_params: Iterable[str] = (),
+    timeout: int = PAGE_CACHE_TTL,
+) -> HttpResponse:
+    """
+    Serve rendered page of the object to anonymous visitors from cache,
+    valid while content version of the object is unchanged.
+    Version and page are read with a single MGET; pages with user-specific
+    content (authenticated user, flash messages) are rendered as usual.
+    """
+
+    if (
+        request.user.is_authenticated
+        or len(get_messages(request))
+        or not set(request.GET) <= set(allowed_params)
+    ):
+        return render()
+
+    version_key = get_version_key(model, pk)
+    page_key = make_key(
+        "page",
+        model._meta.label_lower,  # noqa: WPS437
+        pk,
+        md5(request.build_absolute_uri().encode("utf-8")).hexdigest(),
+    )
+    version, page = redis_client.mget(version_key, page_key)
+    version = int(version or 0)
+
+    if page is not None:
+        page_version, content = page.split(b":", 1)
+        if int(page_version) == version:
+            return HttpResponse(content)
+
+    response = render()
+    if response.status_code == 200 and not response.streaming:
+        redis_client.set(
+            page_key, str(version).encode() + b":" + response.content, ex=timeout
+        )
+    return response
+
+
+def _incr_versions(keys: list[str]) -> None:
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for key in keys:
+            pipeline.incr(key)
+        pipeline.execute()
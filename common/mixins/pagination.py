@@ -0,0 +1,46 @@
+from typing import TYPE_CHECKING
+
+from django.db.models import QuerySet
+from django.http import Http404
+from django.views.generic.list import MultipleObjectMixin
+
+from common.pagination import InvalidCursor, KeysetPaginator
+
+if TYPE_CHECKING:
+    _Base = MultipleObjectMixin
+else:
+    _Base = object
+
+
+class KeysetPaginationMixin(_Base):
+    """
+    Paginate list views with cursors instead of page numbers.
+    Requests with explicit `page` parameter and orderings that can't be
+    paginated by keys are served by the regular paginator.
+    """
+
+    cursor_kwarg = "cursor"
+    keyset_fields: set[str] = {"id"}
+    keyset_default_ordering: tuple[str, ...] = ("-id",)
+    keyset_with_count = False
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> tuple:
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(
+            queryset,
+            per_page=page_size,
+            keyset_fields=self.keyset_fields,
+            default_ordering=self.keyset_default_ordering,
+            with_count=self.keyset_with_count,
+        )
+        if not paginator.is_supported:
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+
+        return paginator, page, page.object_list, page.has_other_pages()
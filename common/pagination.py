@@ -0,0 +1,258 @@
+from typing import Any, Sequence
+
+import json
+from cacheops import CacheMiss, cache
+from django.core import signing
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Model, Q, QuerySet
+from django.utils.functional import cached_property
+from hashlib import md5
+
+from config.settings.base import SESSION_CACHE_TTL
+
+CURSOR_SALT = "common.pagination.cursor"
+
+# Results estimated below this size are counted exactly.
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def count_rows(queryset: QuerySet | None) -> tuple[int, bool]:
+    """
+    Count rows of the queryset without loading model instances.
+    Small results are counted exactly, large ones are estimated by the planner.
+    Result is cached per query signature (SQL + params).
+
+    Returns number of rows and whether it is exact.
+    """
+
+    if queryset is None:
+        return 0, True
+    if queryset._result_cache is not None:  # noqa: WPS437
+        return len(queryset._result_cache), True  # noqa: WPS437
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0, True
+
+    cache_key = "count:" + md5(f"{sql}{params}".encode("utf-8")).hexdigest()
+    try:
+        return cache.get(cache_key)
+    except CacheMiss:
+        pass
+
+    if not queryset.query.where and not queryset.query.is_sliced:
+        estimated = estimate_table_count(queryset)
+    else:
+        estimated = estimate_count(queryset)
+
+    if estimated <= EXACT_COUNT_THRESHOLD:
+        result = queryset.count(), True
+    else:
+        result = estimated, False
+
+    cache.set(cache_key, result, timeout=SESSION_CACHE_TTL)
+    return result
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Estimate number of rows from the query plan, without running the query.
+    """
+
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_table_count(queryset: QuerySet) -> int:
+    """
+    Number of rows in the queryset table according to Postgres statistics.
+    """
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],  # noqa: WPS437
+        )
+        row = cursor.fetchone()
+
+    # Negative value means table was never analyzed yet.
+    if row is None or row[0] < 0:
+        return estimate_count(queryset)
+    return int(row[0])
+
+
+class CountingPaginator(Paginator):
+    """Paginator using cached (and estimated for large results) count."""
+
+    @cached_property
+    def count(self) -> int:
+        count, _ = count_rows(self.object_list)
+        return count
+
+
+class KeysetPage(Sequence):
+    """
+    Page of keyset pagination, navigation is done with opaque cursors
+    instead of page numbers.
+    """
+
+    is_keyset = True
+
+    def __init__(
+        self,
+        object_list: list[Model],
+        paginator: "KeysetPaginator",
+        next_cursor: str | None,
+        previous_cursor: str | None,
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f"<Keyset page of {len(self.object_list)} items>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek pagination: the next page is selected with `WHERE (sort keys) > (last
+    row keys)` instead of `OFFSET`, so the cost of a page doesn't depend on its
+    depth. Works for orderings over `keyset_fields` only, `id` is always added
+    as a tie-breaker.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        keyset_fields: set[str],
+        default_ordering: Sequence[str] = ("-id",),
+        with_count: bool = False,
+    ) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keyset_fields = keyset_fields
+        self.with_count = with_count
+        self.ordering = self._get_ordering(default_ordering)
+
+    @property
+    def is_supported(self) -> bool:
+        return self.ordering is not None and not self.queryset.query.is_sliced
+
+    @cached_property
+    def count(self) -> int | None:
+        """Total count (approximate for large results), if requested."""
+
+        if not self.with_count:
+            return None
+        count, _ = count_rows(self.queryset)
+        return count
+
+    def page(self, cursor: str | None) -> KeysetPage:
+        values, backwards = self._decode_cursor(cursor) if cursor else (None, False)
+        ordering = self._reverse(self.ordering) if backwards else self.ordering
+
+        queryset = self.queryset.order_by(*ordering).annotate(
+            **{self._alias(field): F(field.lstrip("-")) for field in ordering}
+        )
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, values))
+
+        items = list(queryset[: self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+        if backwards:
+            items.reverse()
+
+        next_cursor = previous_cursor = None
+        if items:
+            if has_more or backwards:
+                next_cursor = self._encode_cursor(items[-1], backwards=False)
+            if (has_more and backwards) or (cursor and not backwards):
+                previous_cursor = self._encode_cursor(items[0], backwards=True)
+
+        return KeysetPage(items, self, next_cursor, previous_cursor)
+
+    def _get_ordering(self, default_ordering: Sequence[str]) -> list[str] | None:
+        ordering = list(self.queryset.query.order_by) or list(default_ordering)
+        if not all(
+            isinstance(field, str) and field.lstrip("-") in self.keyset_fields
+            for field in ordering
+        ):
+            return None
+
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
+
+    @staticmethod
+    def _reverse(ordering: list[str]) -> list[str]:
+        return [
+            field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+        ]
+
+    @staticmethod
+    def _alias(field: str) -> str:
+        return f"keyset_{field.lstrip('-')}"
+
+    @staticmethod
+    def _seek_filter(ordering: list[str], values: list[Any]) -> Q:
+        """
+        Rows after given keys in lexicographic order:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+
+        seek_filter = Q()
+        for position, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = Q(**{f"{name}__{lookup}": values[position]})
+            for previous_field, value in zip(ordering[:position], values):
+                condition &= Q(**{previous_field.lstrip("-"): value})
+            seek_filter |= condition
+        return seek_filter
+
+    def _encode_cursor(self, item: Model, backwards: bool) -> str:
+        values = [getattr(item, self._alias(field)) for field in self.ordering]
+        return signing.dumps(
+            [self.ordering, values, backwards], salt=CURSOR_SALT, compress=True
+        )
+
+    def _decode_cursor(self, cursor: str) -> tuple[list[Any], bool]:
+        try:
+            ordering, values, backwards = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor.")
+
+        if ordering != self.ordering or len(values) != len(self.ordering):
+            raise InvalidCursor("Cursor doesn't match current ordering.")
+        return values, bool(backwards)
@@ -4,6 +4,8 @@ from django.http import HttpRequest
 from django.urls import reverse
 from hashlib import md5
 
+from movies.services.user_lists import get_user_movie_ids
+
 register = template.Library()
 
 default_img_size = 300
@@ -35,12 +37,12 @@ def get_movie_url(is_movie: bool, movie_id: int) -> str:
 
 @register.simple_tag
 def is_favorite(user: User, movie_id: int) -> bool:
-    return user.profile.favorites.filter(pk=movie_id).exists()  # type: ignore
+    return movie_id in get_user_movie_ids(user, "favorites")
 
 
 @register.simple_tag
 def in_watchlist(user: User, movie_id: int) -> bool:
-    return user.profile.watchlist.filter(pk=movie_id).exists()  # type: ignore
+    return movie_id in get_user_movie_ids(user, "watchlist")
 
 
 @register.simple_tag
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.humanize",
+    "django.contrib.postgres",
     "allauth",
     "allauth.account",
     "allauth.socialaccount",
@@ -45,6 +46,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "movies.middleware.PageHitsMiddleware",
 ]
 
 X_FRAME_OPTIONS = "SAMEORIGIN"
@@ -305,6 +307,37 @@ CACHEOPS = {
     "auth.user": {"ops": "get", "timeout": SESSION_CACHE_TTL},
     "auth.*": {"ops": "all", "timeout": SESSION_SPECIAL_CACHE_TTL},
     "movies.*": {"ops": "all", "timeout": SESSION_LONG_CACHE_TTL},
+    # Written on every user action, their querysets would be invalidated
+    # more often than read. Pages with them use content versions instead.
+    "movies.vote": None,
+    "movies.comment": None,
+    "movies.rating": None,
 }
 
 CACHEOPS_PREFIX = lambda _: DEPLOY_ENVIRONMENT
+
+# In-process search index (built once per worker, see `movies.services.inverted_index`).
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "False") == "True"
+SEARCH_INDEX_MEMORY_BUDGET = int(
+    os.getenv("SEARCH_INDEX_MEMORY_BUDGET", 64 * 1024 * 1024)  # 64 MB
+)
+SEARCH_INDEX_REFRESH_INTERVAL = 60 * 60 * 6
+SEARCH_INDEX_MAX_RESULTS = 1000
+
+# In-process bitmap index of movie filters (see `movies.services.bitmap_index`).
+BITMAP_INDEX_ENABLED = os.getenv("BITMAP_INDEX_ENABLED", "False") == "True"
+BITMAP_INDEX_MEMORY_BUDGET = int(
+    os.getenv("BITMAP_INDEX_MEMORY_BUDGET", 32 * 1024 * 1024)  # 32 MB
+)
+BITMAP_INDEX_REFRESH_INTERVAL = 60 * 60 * 6
+
+# Memory-mapped columnar snapshot of movies (see `movies.services.catalog_snapshot`).
+CATALOG_SNAPSHOT_DIR = Path(
+    os.getenv("CATALOG_SNAPSHOT_DIR", BASE_DIR / "var" / "catalog")
+)
+CATALOG_SNAPSHOT_CHECK_INTERVAL = 60
+
+# Per-worker tier in front of Redis for tagged caches (see `common.cache.local`).
+LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "True") == "True"
+LOCAL_CACHE_MAX_SIZE = int(os.getenv("LOCAL_CACHE_MAX_SIZE", 16 * 1024 * 1024))  # 16 MB
+LOCAL_CACHE_TTL = 60 * 5
@@ -0,0 +1,6 @@
+from .base import *
+
+# Tests count DB queries, cached querysets would hide them.
+CACHEOPS_ENABLED = False
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -11,6 +11,12 @@ if [ "$POSTGRES_DB" = "strichka_local" ]; then
 fi
 
 make migrate
+
+# Warm caches in background, so the server starts right away.
+if [ "$WARM_CACHES" = "True" ]; then
+  make warm_caches &
+fi
+
 make runserver_dev
 
 exec "$@"
@@ -45,7 +45,7 @@ class MovieViewSet(ModelViewSet):
         filters.OrderingFilter,
     ]
     filterset_fields = ["year", "age_mark", "is_movie"]
-    search_fields = ["=imdb_id", "title"]
+    search_fields = ["=imdb_id", "@search_vector"]
     ordering_fields = ["year", "imdb_rate", "imdb_votes"]
 
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MoviesConfig(AppConfig):
     name = "movies"
     verbose_name = "Movies"
+
+    def ready(self) -> None:
+        from movies import signals  # noqa: F401
+        from movies.services import search  # noqa: F401
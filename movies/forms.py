@@ -7,3 +7,9 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ("text", "user")
+
+
+class RateForm(forms.Form):
+    """User rate of a movie, empty value clears the rate."""
+
+    rate_value = forms.IntegerField(min_value=1, max_value=10, required=False)
@@ -0,0 +1,49 @@
+from typing import Any
+
+import pickle
+from django.core.management.base import BaseCommand, CommandParser
+
+from common.benchmark import run_benchmark
+from movies.models import Movie
+from movies.services import services
+from movies.services.cards import movie_to_card, pack_card, unpack_card
+
+
+class Command(BaseCommand):
+    help = "Compare cached movie list formats: pickled `Movie` instances vs cards."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=18)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        movie_ids = list(
+            Movie.objects.nocache()
+            .order_by("-imdb_votes")
+            .values_list("pk", flat=True)[: options["page_size"]]
+        )
+        if not movie_ids:
+            self.stderr.write("No movies to build a page from.")
+            return
+
+        movies = list(services.get_movies_by_ids(movie_ids).nocache())
+        pickled = pickle.dumps(movies, pickle.HIGHEST_PROTOCOL)
+        packed = [pack_card(movie_to_card(movie)) for movie in movies]
+
+        self.stdout.write(f"Page of {len(movies)} movies")
+        self.stdout.write(f"Pickled instances: {len(pickled):>10} bytes")
+        self.stdout.write(
+            f"Packed cards:      {sum(len(data) for data in packed):>10} bytes"
+        )
+
+        inputs = range(options["repeat"])
+        results = [
+            run_benchmark(
+                "Unpickle instances", lambda _: pickle.loads(pickled), inputs
+            ),
+            run_benchmark(
+                "Unpack cards", lambda _: [unpack_card(data) for data in packed], inputs
+            ),
+        ]
+        for result in results:
+            self.stdout.write(str(result))
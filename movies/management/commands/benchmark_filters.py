@@ -0,0 +1,98 @@
+from typing import Any
+
+import time
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count
+from django.http import QueryDict
+from urllib.parse import urlencode
+
+from common.benchmark import run_benchmark
+from movies.models import Movie, StreamingPlatform
+from movies.services import services
+from movies.services.bitmap_index import BitmapIndex
+from movies.services.filters import AdvancedMovieFilter
+
+
+class Command(BaseCommand):
+    help = "Compare movie filtering QPS: ORM `AdvancedMovieFilter` vs bitmap index."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=18)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        page_size = options["page_size"]
+        combinations = self._get_combinations()
+        if not combinations:
+            self.stderr.write("No movies to build filter combinations from.")
+            return
+
+        started_at = time.perf_counter()
+        index = BitmapIndex(memory_budget=2**63)
+        index.build()
+        self.stdout.write(
+            f"Index: {len(index)} movies, {index.memory_usage / 2**20:.1f} MB, "
+            f"built in {time.perf_counter() - started_at:.2f}s"
+        )
+
+        def filter_orm(params: QueryDict) -> tuple[int, list]:
+            movies = AdvancedMovieFilter(
+                params, queryset=services.get_all_movies().nocache()
+            ).qs
+            if "sort_by" not in params:
+                movies = movies.order_by("-imdb_votes", "-id")
+            return movies.count(), list(movies[:page_size])
+
+        def filter_index(params: QueryDict) -> tuple[int, list]:
+            movie_ids = index.filter(params) or []
+            page = services.get_movies_by_ids(movie_ids[:page_size]).nocache()
+            return len(movie_ids), list(page)
+
+        for params in combinations:
+            inputs = [params] * options["repeat"]
+            self.stdout.write(f"\n{params.urlencode()}")
+            self.stdout.write(
+                f"Matched: ORM {filter_orm(params)[0]}, index {filter_index(params)[0]}"
+            )
+            results = [
+                run_benchmark("ORM filter + count + page", filter_orm, inputs),
+                run_benchmark("Index (ids only)", index.filter, inputs),
+                run_benchmark("Index + page hydration", filter_index, inputs),
+            ]
+            for result in results:
+                self.stdout.write(str(result))
+
+    @staticmethod
+    def _get_combinations() -> list[QueryDict]:
+        """Filter combinations built from the most common facet values."""
+
+        genre = _most_common(Movie.genres.through.objects, "genre__slug")
+        country = _most_common(Movie.countries.through.objects, "country__name")
+        platform = _most_common(StreamingPlatform.objects, "service")
+        age_mark = _most_common(Movie.objects, "age_mark")
+        if not all((genre, country, platform, age_mark)):
+            return []
+
+        return [
+            _params(genres=genre, is_movie="true"),
+            _params(genres=genre, countries=country, age_marks=age_mark),
+            _params(platforms=platform, genres=genre, imdb_rate__gt=7),
+            _params(
+                countries=country, platforms=platform, is_movie="false", sort_by="-year"
+            ),
+        ]
+
+
+def _params(**params: Any) -> QueryDict:
+    return QueryDict(urlencode(params))
+
+
+def _most_common(queryset: Any, field: str) -> str | None:
+    values = (
+        queryset.nocache()
+        .values(field)
+        .annotate(total=Count("*"))
+        .order_by("-total")
+        .values_list(field, flat=True)
+    )
+    return values.first()
@@ -0,0 +1,68 @@
+from typing import Any
+
+import time
+from django.core.management.base import BaseCommand, CommandParser
+
+from common.benchmark import run_benchmark
+from movies.models import Movie
+from movies.services import services
+from movies.services.inverted_index import InvertedIndex
+from movies.services.search import WORD_RE, build_search_query
+
+
+class Command(BaseCommand):
+    help = "Compare search QPS: ORM `icontains`, full-text search, in-process index."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--queries", type=int, default=300)
+        parser.add_argument("--page-size", type=int, default=30)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        page_size = options["page_size"]
+        queries = self._get_queries(options["queries"])
+        if not queries:
+            self.stderr.write("No movies to build search queries from.")
+            return
+
+        started_at = time.perf_counter()
+        index = InvertedIndex(memory_budget=2**63)
+        index.build()
+        self.stdout.write(
+            f"Index: {len(index)} movies, {index.memory_usage / 2**20:.1f} MB, "
+            f"built in {time.perf_counter() - started_at:.2f}s"
+        )
+
+        def search_icontains(query: str) -> list:
+            movies = Movie.objects.nocache().filter(title__icontains=query)
+            return list(movies.order_by("-imdb_votes")[:page_size])
+
+        def search_full_text(query: str) -> list:
+            movies = Movie.objects.nocache().filter(
+                search_vector=build_search_query(query)
+            )
+            return list(movies.order_by("-imdb_votes")[:page_size])
+
+        def search_index(query: str) -> list:
+            movie_ids = index.search(query)[:page_size]
+            return list(services.get_movies_by_ids(movie_ids).nocache())
+
+        results = [
+            run_benchmark("ORM title__icontains", search_icontains, queries),
+            run_benchmark("ORM full-text search", search_full_text, queries),
+            run_benchmark("Index (ids only)", index.search, queries),
+            run_benchmark("Index + page hydration", search_index, queries),
+        ]
+        for result in results:
+            self.stdout.write(str(result))
+
+    @staticmethod
+    def _get_queries(count: int) -> list[str]:
+        """Build queries from the first words of random titles."""
+
+        titles = Movie.objects.nocache().order_by("?").values_list("title", flat=True)
+        queries = []
+        for title in titles[:count]:
+            words = WORD_RE.findall(title)
+            if words:
+                queries.append(" ".join(words[:2]))
+        return queries
@@ -0,0 +1,20 @@
+from typing import Any
+
+import time
+from django.core.management.base import BaseCommand
+
+from movies.services.catalog_snapshot import CatalogSnapshot, build_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write columnar snapshot of movies (run on schedule, e.g. by cron)."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started_at = time.perf_counter()
+        path = build_catalog_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Catalog snapshot {path}: {len(CatalogSnapshot(path))} movies, "
+                f"built in {time.perf_counter() - started_at:.1f}s."
+            )
+        )
@@ -0,0 +1,34 @@
+from typing import Any
+
+import time
+from django.core.management.base import BaseCommand, CommandParser
+
+from movies.services.recommendations import (
+    CHUNK_SIZE,
+    MAX_CANDIDATE_DF,
+    RECOMMENDATIONS_TOP_K,
+    build_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = "Precompute similar movies (by genres, countries, cast and keywords)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--top-k", type=int, default=RECOMMENDATIONS_TOP_K)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--max-df", type=int, default=MAX_CANDIDATE_DF)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started_at = time.perf_counter()
+        stored = build_recommendations(
+            top_k=options["top_k"],
+            chunk_size=options["chunk_size"],
+            max_candidate_df=options["max_df"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recommendations for {stored} movies built "
+                f"in {time.perf_counter() - started_at:.1f}s."
+            )
+        )
@@ -0,0 +1,33 @@
+from typing import Any
+
+import time
+from django.core.management.base import BaseCommand, CommandParser
+
+from movies.services.collaborative import (
+    build_user_recommendations,
+    refresh_user_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = "Precompute personal recommendations (by rates, likes and user lists)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Refresh only users whose signals changed since the last run.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started_at = time.perf_counter()
+        if options["incremental"]:
+            users = refresh_user_recommendations()
+        else:
+            users = build_user_recommendations()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recommendations for {users} users built "
+                f"in {time.perf_counter() - started_at:.1f}s."
+            )
+        )
@@ -0,0 +1,46 @@
+from typing import Any
+
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandParser
+
+from common.cache.tags import get_cache_metrics, reset_cache_metrics
+
+
+class Command(BaseCommand):
+    help = "Show hit ratio of tagged caches and invalidation fan-out of tags."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--reset", action="store_true", help="Reset counters.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["reset"]:
+            reset_cache_metrics()
+            self.stdout.write(self.style.SUCCESS("Cache metrics reset."))
+            return
+
+        caches: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        tags: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for field, value in get_cache_metrics().items():
+            name, counter = field.rsplit(":", 1)
+            if name.startswith("tag:"):
+                tags[name[4:]][counter] = value
+            else:
+                caches[name][counter] = value
+
+        for name, counters in sorted(caches.items()):
+            hits = counters["local_hits"] + counters["hits"]
+            total = hits + counters["misses"] + counters["stale"]
+            ratio = hits / total if total else 0
+            local_ratio = counters["local_hits"] / total if total else 0
+            self.stdout.write(
+                f"{name:<32} hit ratio {ratio:>6.1%} (local {local_ratio:>6.1%})  "
+                f"hits {hits:>8}  misses {counters['misses']:>8}  "
+                f"stale {counters['stale']:>8}"
+            )
+        for name, counters in sorted(tags.items()):
+            invalidations = counters["invalidations"]
+            fanout = counters["fanout"] / invalidations if invalidations else 0
+            self.stdout.write(
+                f"tag {name:<28} invalidations {invalidations:>8}  "
+                f"avg fan-out {fanout:>8.1f}"
+            )
@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from movies.services.user_lists import flush_user_lists
+
+
+class Command(BaseCommand):
+    help = "Write queued favorites/watchlist toggles from Redis to DB."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        processed = flush_user_lists()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {processed} toggles."))
@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from movies.services.activity import ACTIVITY_WINDOWS, rebuild_activity_ranking
+
+
+class Command(BaseCommand):
+    help = "Rebuild movies activity rankings (run on schedule, e.g. by cron)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--window",
+            choices=list(ACTIVITY_WINDOWS),
+            action="append",
+            help="Windows to rebuild, all by default.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for window in options["window"] or ACTIVITY_WINDOWS:
+            ranked = rebuild_activity_ranking(window)
+            self.stdout.write(
+                self.style.SUCCESS(f"Activity ranking ({window}): {ranked} movies.")
+            )
@@ -0,0 +1,15 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from movies.models import Cast, Comment, Movie
+from movies.services.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recount denormalized vote and rating counters, fixing drifted ones."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for model in (Movie, Cast, Comment):
+            drifted = reconcile_counters(model)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {drifted} fixed")
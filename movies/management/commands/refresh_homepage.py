@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from movies.services.homepage import refresh_homepage
+
+
+class Command(BaseCommand):
+    help = "Rebuild precomputed homepage payload (run on schedule, e.g. by cron)."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        refresh_homepage()
+        self.stdout.write(self.style.SUCCESS("Homepage payload refreshed."))
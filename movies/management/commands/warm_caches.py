@@ -0,0 +1,90 @@
+from typing import Any
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+from django.test import Client
+
+from movies.services.warmup import (
+    WARMUP_HEADER,
+    WarmupPage,
+    get_catalog_pages,
+    get_top_pages,
+)
+
+
+class Command(BaseCommand):
+    help = "Request catalog pages and filter endpoints to populate caches."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=None,
+            help="Warm only the N most requested pages instead of all catalog pages.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of pages requested at once.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        pages = get_top_pages(options["top"]) if options["top"] else []
+        if not pages:
+            # No hits counted yet (or Redis was flushed): all catalog pages.
+            pages = get_catalog_pages()[: options["top"]]
+        if not pages:
+            self.stderr.write("No pages to warm.")
+            return
+
+        clients = threading.local()
+        host = _get_host()
+
+        def warm(page: WarmupPage) -> tuple[WarmupPage, int, float]:
+            if not hasattr(clients, "client"):
+                clients.client = Client(
+                    HTTP_HOST=host,
+                    raise_request_exception=False,
+                    **{WARMUP_HEADER: "1"},
+                )
+            headers = (
+                {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"} if page.is_ajax else {}
+            )
+            started_at = time.perf_counter()
+            try:
+                status = clients.client.get(page.url, **headers).status_code
+            finally:
+                connections.close_all()
+            return page, status, time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(options["concurrency"], 1)) as executor:
+            results = list(executor.map(warm, pages))
+        total = time.perf_counter() - started_at
+
+        for page, status, duration in results:
+            line = f"{status} {duration * 1000:>9.1f} ms  {page.url}"
+            self.stdout.write(line if status == 200 else self.style.WARNING(line))
+
+        failed = sum(status != 200 for _, status, _ in results)
+        slowest = max(duration for _, _, duration in results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {len(results) - failed} of {len(results)} pages in "
+                f"{total:.2f}s, slowest {slowest * 1000:.1f} ms."
+            )
+        )
+
+
+def _get_host() -> str:
+    """Host accepted by `ALLOWED_HOSTS`, pages are requested in-process."""
+
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
@@ -0,0 +1,29 @@
+from typing import Callable
+
+from django.http import HttpRequest, HttpResponse
+
+from movies.services.warmup import WARMABLE_URL_NAMES, WARMUP_HEADER, count_page_hit
+
+
+class PageHitsMiddleware:
+    """
+    Count successful requests of catalog pages, so the most requested ones
+    can be warmed first (see `warm_caches` command). Warmup requests are
+    not counted, they would rank the pages they warm higher.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        match = request.resolver_match
+        if (
+            request.method == "GET"
+            and response.status_code == 200
+            and match is not None
+            and match.url_name in WARMABLE_URL_NAMES
+            and WARMUP_HEADER not in request.META
+        ):
+            count_page_hit(request.path)
+        return response
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.6 on 2026-10-18 06:22
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+POPULATE_SEARCH_VECTOR_SQL = """
+UPDATE movies_movie AS movie SET search_vector =
+    setweight(to_tsvector('english', coalesce(movie.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(movie.keywords, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(cast_member.full_name, ' ')
+        FROM movies_cast AS cast_member
+        WHERE cast_member.id IN (
+            SELECT actors.cast_id FROM movies_movie_actors AS actors
+            WHERE actors.movie_id = movie.id
+            UNION
+            SELECT directors.cast_id FROM movies_movie_directors AS directors
+            WHERE directors.movie_id = movie.id
+        )
+    ), '')), 'C')
+    || setweight(to_tsvector('english', coalesce(movie.plot, '')), 'D');
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [("movies", "0011_alter_movie_title")]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, help_text="Full-text search document", null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="movie_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_VECTOR_SQL, migrations.RunSQL.noop),
+    ]
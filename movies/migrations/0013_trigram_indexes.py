@@ -0,0 +1,29 @@
+# Generated by Django 4.1.6 on 2026-10-18 06:24
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [("movies", "0012_movie_search_vector")]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="cast",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["full_name"],
+                name="cast_full_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"],
+                name="movie_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
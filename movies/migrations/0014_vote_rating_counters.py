@@ -0,0 +1,104 @@
+# Generated by Django 4.1.6 on 2026-10-18 06:31
+
+from django.db import migrations, models
+
+POPULATE_VOTES_COUNTERS_SQL = """
+UPDATE movies_{model} AS obj
+SET likes_count = counters.likes, dislikes_count = counters.dislikes
+FROM (
+    SELECT
+        vote.object_id,
+        count(*) FILTER (WHERE vote.vote > 0) AS likes,
+        count(*) FILTER (WHERE vote.vote < 0) AS dislikes
+    FROM movies_vote AS vote
+    JOIN django_content_type AS ct ON ct.id = vote.content_type_id
+    WHERE ct.app_label = 'movies' AND ct.model = '{model}'
+    GROUP BY vote.object_id
+) AS counters
+WHERE counters.object_id = obj.id;
+"""
+
+POPULATE_RATING_COUNTERS_SQL = """
+UPDATE movies_{model} AS obj
+SET rating_sum = counters.rating_sum, rating_count = counters.rating_count
+FROM (
+    SELECT
+        rating.object_id,
+        coalesce(sum(rating.value), 0) AS rating_sum,
+        count(rating.value) AS rating_count
+    FROM movies_rating AS rating
+    JOIN django_content_type AS ct ON ct.id = rating.content_type_id
+    WHERE ct.app_label = 'movies' AND ct.model = '{model}'
+    GROUP BY rating.object_id
+) AS counters
+WHERE counters.object_id = obj.id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [("movies", "0013_trigram_indexes")]
+
+    operations = [
+        migrations.AddField(
+            model_name="cast",
+            name="dislikes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cast",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cast",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cast",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="dislikes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="dislikes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        *(
+            migrations.RunSQL(
+                POPULATE_VOTES_COUNTERS_SQL.format(model=model), migrations.RunSQL.noop
+            )
+            for model in ("movie", "cast", "comment")
+        ),
+        *(
+            migrations.RunSQL(
+                POPULATE_RATING_COUNTERS_SQL.format(model=model), migrations.RunSQL.noop
+            )
+            for model in ("movie", "cast")
+        ),
+    ]
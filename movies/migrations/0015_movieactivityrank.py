@@ -0,0 +1,67 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [("movies", "0014_vote_rating_counters")]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovieActivityRank",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "window",
+                    models.CharField(
+                        choices=[("week", "Week"), ("month", "Month"), ("year", "Year")],
+                        help_text="Activity time window",
+                        max_length=8,
+                    ),
+                ),
+                (
+                    "position",
+                    models.PositiveIntegerField(help_text="Position in the ranking"),
+                ),
+                (
+                    "votes_sum",
+                    models.IntegerField(help_text="Sum of votes over the window"),
+                ),
+                (
+                    "comments_count",
+                    models.PositiveIntegerField(
+                        help_text="Number of comments over the window"
+                    ),
+                ),
+                (
+                    "movie",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_ranks",
+                        to="movies.movie",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Movie activity ranks",
+                "unique_together": {("window", "movie")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="movieactivityrank",
+            index=models.Index(
+                fields=["window", "position"], name="movie_activity_rank_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 from mptt.fields import TreeForeignKey
@@ -92,7 +94,37 @@ class Vote(StrichkaBaseModel):
         unique_together = ("user", "content_type", "object_id")
 
 
-class Comment(StrichkaBaseModel, MPTTModel):
+class VotesCountersModel(models.Model):
+    """
+    Denormalized likes/dislikes counters, maintained by `add_vote`.
+    """
+
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class RatingCountersModel(models.Model):
+    """
+    Denormalized rating counters, maintained by `add_rate`.
+    """
+
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_average(self) -> float | None:
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+
+class Comment(StrichkaBaseModel, VotesCountersModel, MPTTModel):
     """
     Model to store comments on movies, actors, series.
     Have tree structure for convenient use.
@@ -120,7 +152,7 @@ class Comment(StrichkaBaseModel, MPTTModel):
         return self.text
 
 
-class Cast(StrichkaBaseModel):
+class Cast(StrichkaBaseModel, VotesCountersModel, RatingCountersModel):
     """
     Model to store information about movie cast.
     """
@@ -156,6 +188,15 @@ class Cast(StrichkaBaseModel):
     ratings = GenericRelation(Rating)
     votes = GenericRelation(Vote, related_query_name="cast")
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["full_name"],
+                name="cast_full_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            )
+        ]
+
     def __str__(self) -> str:
         return self.full_name
 
@@ -199,7 +240,7 @@ class Country(StrichkaBaseModel):
         validate_form_with_schema(CountrySchema, CountrySerializer, self)
 
 
-class Movie(StrichkaBaseModel):
+class Movie(StrichkaBaseModel, VotesCountersModel, RatingCountersModel):
     """
     Model with information about movies and series.
     """
@@ -259,10 +300,22 @@ class Movie(StrichkaBaseModel):
     ratings = GenericRelation(Rating)
     votes = GenericRelation(Vote, related_query_name="movie")
 
+    search_vector = SearchVectorField(
+        null=True, editable=False, help_text="Full-text search document"
+    )
+
     objects: MovieManager = MovieManager()
 
     class Meta:
         verbose_name_plural = "Movies"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="movie_search_vector_idx"),
+            GinIndex(
+                fields=["title"],
+                name="movie_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.year})"
@@ -285,6 +338,41 @@ class Movie(StrichkaBaseModel):
         validate_form_with_schema(MovieSchema, MovieBaseSerializer, self)
 
 
+class MovieActivityRank(StrichkaBaseModel):
+    """
+    Materialized ranking of movies by users activity (votes and comments)
+    over a time window, rebuilt periodically by `rebuild_activity_ranking`.
+    """
+
+    WEEK = "week"
+    MONTH = "month"
+    YEAR = "year"
+
+    WINDOW_CHOICES = ((WEEK, "Week"), (MONTH, "Month"), (YEAR, "Year"))
+
+    movie = models.ForeignKey(
+        Movie, on_delete=models.CASCADE, related_name="activity_ranks"
+    )
+    window = models.CharField(
+        max_length=8, choices=WINDOW_CHOICES, help_text="Activity time window"
+    )
+    position = models.PositiveIntegerField(help_text="Position in the ranking")
+    votes_sum = models.IntegerField(help_text="Sum of votes over the window")
+    comments_count = models.PositiveIntegerField(
+        help_text="Number of comments over the window"
+    )
+
+    class Meta:
+        verbose_name_plural = "Movie activity ranks"
+        unique_together = ("window", "movie")
+        indexes = [
+            models.Index(fields=["window", "position"], name="movie_activity_rank_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.window} #{self.position}: {self.movie_id}"
+
+
 class StreamingPlatform(StrichkaBaseModel):
     """
     Models to store movie links to streaming services.
@@ -0,0 +1,70 @@
+from dateutil.relativedelta import relativedelta
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Sum
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from movies.models import Comment, Movie, MovieActivityRank, Vote
+
+ACTIVITY_WINDOWS = {
+    MovieActivityRank.WEEK: relativedelta(weeks=1),
+    MovieActivityRank.MONTH: relativedelta(months=1),
+    MovieActivityRank.YEAR: relativedelta(years=1),
+}
+ACTIVITY_RANKING_SIZE = 300
+
+
+def rebuild_activity_ranking(window: str, size: int = ACTIVITY_RANKING_SIZE) -> int:
+    """
+    Rank movies voted over the window by sum of votes, then by number of
+    comments. Votes and comments are aggregated separately (no votes x comments
+    join), the ranking replaces the previous one in a transaction.
+    Returns number of ranked movies.
+    """
+
+    since = timezone.now() - ACTIVITY_WINDOWS[window]
+    content_type = ContentType.objects.get_for_model(Movie)
+
+    votes = dict(
+        Vote.objects.nocache()
+        .filter(content_type=content_type, liked_on__gte=since, vote__isnull=False)
+        .values("object_id")
+        .annotate(total=Sum("vote"))
+        .values_list("object_id", "total")
+    )
+    comments = dict(
+        Comment.objects.nocache()
+        .filter(content_type=content_type, commented_on__gte=since)
+        .values("object_id")
+        .annotate(total=Count("id"))
+        .values_list("object_id", "total")
+    )
+    existing = set(
+        Movie.objects.nocache().filter(pk__in=votes).values_list("pk", flat=True)
+    )
+
+    ranked = sorted(
+        existing,
+        key=lambda movie_id: (-votes[movie_id], -comments.get(movie_id, 0), movie_id),
+    )[:size]
+
+    with atomic():
+        MovieActivityRank.objects.filter(window=window).delete()
+        MovieActivityRank.objects.bulk_create(
+            MovieActivityRank(
+                movie_id=movie_id,
+                window=window,
+                position=position,
+                votes_sum=votes[movie_id],
+                comments_count=comments.get(movie_id, 0),
+            )
+            for position, movie_id in enumerate(ranked, start=1)
+        )
+    return len(ranked)
+
+
+def get_activity_ranked_ids(window: str) -> list[int]:
+    """Ids of ranked movies, read with the (window, position) index."""
+
+    ranks = MovieActivityRank.objects.filter(window=window).order_by("position")
+    return list(ranks.values_list("movie_id", flat=True))
@@ -0,0 +1,420 @@
+from typing import Iterable, Iterator
+
+import logging
+import math
+import numpy as np
+import threading
+import time
+from collections import defaultdict
+from django.http import QueryDict
+
+from common.cache.changes import INITIAL_POSITION, SYNC_INTERVAL, ChangeLog
+from config.settings.base import (
+    BITMAP_INDEX_ENABLED,
+    BITMAP_INDEX_MEMORY_BUDGET,
+    BITMAP_INDEX_REFRESH_INTERVAL,
+)
+from movies.models import Movie, StreamingPlatform
+
+logger = logging.getLogger(__name__)
+
+# Filter params answered by bitmaps, with normalization of their values
+# (same lookups as `AdvancedMovieFilter`: `iexact` for most of them).
+FACET_PARAMS = {
+    "genres": str.lower,
+    "countries": str.lower,
+    "age_marks": str.lower,
+    "platforms": str,
+    "is_movie": str,
+}
+# Range filter params answered by column arrays: param -> (column, is lower bound).
+RANGE_PARAMS = {
+    "year__gt": ("year", True),
+    "year__lt": ("year", False),
+    "imdb_rate__gt": ("imdb_rate", True),
+    "imdb_rate__lt": ("imdb_rate", False),
+    "imdb_vote__gt": ("imdb_votes", True),
+    "imdb_vote__lt": ("imdb_votes", False),
+}
+COLUMNS = {"year": np.uint16, "imdb_rate": np.float64, "imdb_votes": np.uint32}
+DEFAULT_ORDERING = "-imdb_votes"
+
+# Values accepted by `BooleanFilter` (`NullBooleanSelect`), others are ignored.
+BOOLEAN_VALUES = {
+    "true": "true",
+    "True": "true",
+    "2": "true",
+    "false": "false",
+    "False": "false",
+    "3": "false",
+}
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+class BitmapIndex:
+    """
+    In-memory bitmap index of movie filters. Every facet value (genre, country,
+    platform, age mark, type) has a bitmap over movie ids (bit N is movie id N),
+    packed 8 movies per byte. Facet filters are bitwise AND of their bitmaps,
+    ranges and ordering use column arrays indexed by movie id.
+    """
+
+    def __init__(self, memory_budget: int = BITMAP_INDEX_MEMORY_BUDGET) -> None:
+        self.memory_budget = memory_budget
+
+        self._size = 0
+        self._movies = np.zeros(0, dtype=np.uint8)
+        self._bitmaps: dict[tuple[str, str], np.ndarray] = {}
+        self._columns = {
+            name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+        self._movie_values: dict[int, tuple[tuple[str, str], ...]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._movie_values)
+
+    @property
+    def memory_usage(self) -> int:
+        """Approximate size of the index in bytes."""
+
+        bitmaps_size = sum(bitmap.nbytes for bitmap in self._bitmaps.values())
+        columns_size = sum(column.nbytes for column in self._columns.values())
+        values_size = sum(len(values) * 8 for values in self._movie_values.values())
+        return self._movies.nbytes + bitmaps_size + columns_size + values_size
+
+    def build(self) -> None:
+        """
+        Build index from DB, raise `MemoryBudgetExceeded` if it gets too large.
+        """
+
+        movies, values = _load_movies()
+        with self._lock:
+            self._size = 0
+            self._movies = np.zeros(0, dtype=np.uint8)
+            self._bitmaps = {}
+            self._columns = {
+                name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()
+            }
+            self._movie_values = {}
+            self._set_movies(movies, values)
+
+        self._check_memory_budget()
+
+    def update_movies(self, movie_ids: Iterable[int]) -> None:
+        """Re-index given movies, removed movies are dropped from the index."""
+
+        movie_ids = set(movie_ids)
+        movies, values = _load_movies(movie_ids=movie_ids)
+        with self._lock:
+            self._remove_movies(movie_ids)
+            self._set_movies(movies, values)
+
+    def remove_movies(self, movie_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._remove_movies(set(movie_ids))
+
+    def filter(self, params: QueryDict) -> list[int] | None:
+        """
+        Ids of movies matching filter params, in the requested ordering.
+        None means params can't be answered by the index and the query
+        should go to the DB.
+        """
+
+        query = _parse_query(params)
+        if query is None:
+            return None
+        facets, ranges, ordering = query
+
+        with self._lock:
+            bitmap = self._movies.copy()
+            for facet_value in facets.items():
+                value_bitmap = self._bitmaps.get(facet_value)
+                if value_bitmap is None:
+                    return []
+                bitmap &= value_bitmap
+
+            matched = np.unpackbits(bitmap, count=self._size, bitorder="little")
+            matched = matched.astype(bool)
+            for column, is_lower_bound, bound in ranges:
+                if is_lower_bound:
+                    matched &= self._columns[column] >= bound
+                else:
+                    matched &= self._columns[column] <= bound
+
+            movie_ids = np.flatnonzero(matched)
+            sort_keys = self._columns[ordering.lstrip("-")][movie_ids]
+
+        if ordering.startswith("-"):
+            order = np.lexsort((-movie_ids, -sort_keys.astype(np.float64)))
+        else:
+            order = np.lexsort((movie_ids, sort_keys))
+        return movie_ids[order].tolist()
+
+    def _set_movies(
+        self, movies: dict[int, dict], values: dict[int, set[tuple[str, str]]]
+    ) -> None:
+        if not movies:
+            return
+        self._grow(max(movies) + 1)
+
+        movie_ids = np.fromiter(movies, dtype=np.int64, count=len(movies))
+        _set_bits(self._movies, movie_ids)
+        for name, column in self._columns.items():
+            column[movie_ids] = [movies[movie_id][name] or 0 for movie_id in movies]
+
+        value_movies: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for movie_id in movies:
+            movie_values = values.get(movie_id, set())
+            self._movie_values[movie_id] = tuple(movie_values)
+            for value in movie_values:
+                value_movies[value].append(movie_id)
+
+        for value, value_ids in value_movies.items():
+            if value not in self._bitmaps:
+                self._bitmaps[value] = np.zeros_like(self._movies)
+            _set_bits(self._bitmaps[value], np.array(value_ids, dtype=np.int64))
+
+    def _remove_movies(self, movie_ids: set[int]) -> None:
+        for movie_id in movie_ids:
+            if movie_id >= self._size:
+                continue
+            _clear_bit(self._movies, movie_id)
+            for value in self._movie_values.pop(movie_id, ()):
+                _clear_bit(self._bitmaps[value], movie_id)
+
+    def _grow(self, size: int) -> None:
+        """Extend bitmaps and columns to fit movie ids below `size`."""
+
+        if size <= self._size:
+            return
+        # Leave room for new movies, so bitmaps aren't copied on every insert.
+        size = max(size, self._size + self._size // 4)
+        n_bytes = (size + 7) // 8
+        self._movies = _resize(self._movies, n_bytes)
+        self._bitmaps = {
+            value: _resize(bitmap, n_bytes) for value, bitmap in self._bitmaps.items()
+        }
+        self._columns = {
+            name: _resize(column, size) for name, column in self._columns.items()
+        }
+        self._size = size
+
+    def _check_memory_budget(self) -> None:
+        if self.memory_usage > self.memory_budget:
+            raise MemoryBudgetExceeded(
+                f"Bitmap index takes {self.memory_usage} bytes, "
+                f"budget is {self.memory_budget} bytes."
+            )
+
+
+def _parse_query(
+    params: QueryDict,
+) -> tuple[dict[str, str], list[tuple[str, bool, float]], str] | None:
+    """
+    Facet values, range bounds and ordering of filter params, None if some
+    of them can't be answered by the index. The last value of a param is
+    used, as filter forms do.
+    """
+
+    facets: dict[str, str] = {}
+    ranges: list[tuple[str, bool, float]] = []
+    ordering = DEFAULT_ORDERING
+    for param in params:
+        value = params[param]
+        if value == "":
+            continue
+        if param in FACET_PARAMS:
+            facet_value = _parse_facet_value(param, value)
+            if facet_value is not None:
+                facets[param] = facet_value
+        elif param in RANGE_PARAMS:
+            bound = _parse_bound(value)
+            if bound is None:
+                return None
+            ranges.append((*RANGE_PARAMS[param], bound))
+        elif param == "sort_by" and value.lstrip("-") in COLUMNS:
+            ordering = value
+        else:
+            return None
+    return facets, ranges, ordering
+
+
+def _parse_facet_value(param: str, value: str) -> str | None:
+    """Normalized facet value, None if the filter ignores the value."""
+
+    if param == "is_movie":
+        return BOOLEAN_VALUES.get(value)
+    value = value.strip()
+    return FACET_PARAMS[param](value) if value else None
+
+
+def _parse_bound(value: str) -> float | None:
+    try:
+        bound = float(value)
+    except ValueError:
+        return None
+    return bound if math.isfinite(bound) else None
+
+
+def _set_bits(bitmap: np.ndarray, positions: np.ndarray) -> None:
+    np.bitwise_or.at(
+        bitmap, positions >> 3, np.left_shift(1, positions & 7).astype(np.uint8)
+    )
+
+
+def _clear_bit(bitmap: np.ndarray, position: int) -> None:
+    bitmap[position >> 3] &= ~np.uint8(1 << (position & 7))
+
+
+def _resize(array: np.ndarray, size: int) -> np.ndarray:
+    resized = np.zeros(size, dtype=array.dtype)
+    resized[: len(array)] = array
+    return resized
+
+
+def _iter_movie_values(
+    movie_ids: set[int] | None = None,
+) -> Iterator[tuple[int, str, str]]:
+    """Facet values of movies: genres, countries and streaming platforms."""
+
+    genres = Movie.genres.through.objects.nocache()
+    countries = Movie.countries.through.objects.nocache()
+    platforms = StreamingPlatform.objects.nocache()
+    if movie_ids is not None:
+        genres = genres.filter(movie_id__in=movie_ids)
+        countries = countries.filter(movie_id__in=movie_ids)
+        platforms = platforms.filter(movie_id__in=movie_ids)
+
+    relations = (
+        ("genres", genres.values_list("movie_id", "genre__slug")),
+        ("countries", countries.values_list("movie_id", "country__name")),
+        ("platforms", platforms.values_list("movie_id", "service")),
+    )
+    for facet, pairs in relations:
+        for movie_id, value in pairs.iterator(chunk_size=10000):
+            if value:
+                yield movie_id, facet, FACET_PARAMS[facet](value)
+
+
+def _load_movies(
+    movie_ids: set[int] | None = None,
+) -> tuple[dict[int, dict], dict[int, set[tuple[str, str]]]]:
+    """Column values and facet values of movies, by movie id."""
+
+    fields = ["id", "is_movie", "age_mark", *COLUMNS]
+    movies_queryset = Movie.objects.nocache().values(*fields)
+    if movie_ids is not None:
+        movies_queryset = movies_queryset.filter(pk__in=movie_ids)
+
+    movies: dict[int, dict] = {}
+    values: dict[int, set[tuple[str, str]]] = defaultdict(set)
+    for movie in movies_queryset.iterator(chunk_size=10000):
+        movies[movie["id"]] = movie
+        values[movie["id"]].add(("is_movie", "true" if movie["is_movie"] else "false"))
+        if movie["age_mark"]:
+            values[movie["id"]].add(("age_marks", movie["age_mark"].lower()))
+
+    for movie_id, facet, value in _iter_movie_values(movie_ids=movie_ids):
+        if movie_id in movies:
+            values[movie_id].add((facet, value))
+    return movies, values
+
+
+BITMAP_INDEX_CHANGES = ChangeLog("bitmap-index")
+
+_index: BitmapIndex | None = None
+_index_checked_at: float | None = None
+_index_position = INITIAL_POSITION
+_index_synced_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_bitmap_index() -> BitmapIndex | None:
+    """
+    Get the bitmap index of the current worker, (re)building it when it's
+    missing or expired. None means filtering should go to the DB: index is
+    disabled or doesn't fit into the memory budget.
+    Movies changed by any worker are re-indexed from `BITMAP_INDEX_CHANGES`.
+    """
+
+    global _index, _index_checked_at, _index_position, _index_synced_at  # noqa: WPS420
+
+    if not BITMAP_INDEX_ENABLED:
+        return None
+
+    if not _is_expired(_index_checked_at) and not _is_sync_due():
+        return _index
+
+    with _index_lock:
+        if _is_expired(_index_checked_at) or not _sync_index():
+            _index_position = BITMAP_INDEX_CHANGES.get_position()
+            _index = _build_index()
+            _index_checked_at = _index_synced_at = time.monotonic()
+    return _index
+
+
+def update_bitmap_index(movie_ids: Iterable[int]) -> None:
+    """
+    Re-index movies in bitmap indexes of all workers once the transaction
+    is committed, removed movies are dropped from them.
+    """
+
+    BITMAP_INDEX_CHANGES.add(movie_ids)
+
+
+def expire_bitmap_index() -> None:
+    """Rebuild indexes of all workers (changes without known movie ids)."""
+
+    BITMAP_INDEX_CHANGES.reset()
+
+
+def _is_sync_due() -> bool:
+    # Disabled index has nothing to sync until it's rebuilt on expiration.
+    return _index is not None and time.monotonic() - _index_synced_at > SYNC_INTERVAL
+
+
+def _sync_index() -> bool:
+    """
+    Re-index movies changed since the index was built or synced,
+    False if the index has to be rebuilt instead.
+    """
+
+    global _index_position, _index_synced_at  # noqa: WPS420
+
+    if not _is_sync_due():
+        return True
+
+    changes = BITMAP_INDEX_CHANGES.read(_index_position)
+    if changes is None:
+        return False
+    _index_position, movie_ids = changes
+    if movie_ids:
+        _index.update_movies(movie_ids)  # type: ignore
+    _index_synced_at = time.monotonic()
+    return True
+
+
+def _is_expired(checked_at: float | None) -> bool:
+    if checked_at is None:
+        return True
+    return time.monotonic() - checked_at > BITMAP_INDEX_REFRESH_INTERVAL
+
+
+def _build_index() -> BitmapIndex | None:
+    index = BitmapIndex()
+    started_at = time.monotonic()
+    try:
+        index.build()
+    except MemoryBudgetExceeded as e:
+        logger.warning(f"Bitmap index is disabled: {e}")
+        return None
+
+    logger.info(
+        f"Bitmap index built in {time.monotonic() - started_at:.2f}s: "
+        f"{len(index)} movies, {index.memory_usage} bytes."
+    )
+    return index
@@ -0,0 +1,181 @@
+from typing import Iterable, NamedTuple
+
+import pickle
+import struct
+import time
+import zlib
+from cacheops.redis import redis_client
+from django.db import transaction
+from django.urls import reverse
+
+from common.cache.redis import make_key
+from config.settings.base import SESSION_SPECIAL_CACHE_TTL
+from movies.models import Movie
+from movies.services.query_builder import MovieQueryBuilder
+
+# Bumped when the format of stored cards changes.
+CARDS_VERSION = 2
+CARDS_KEY = make_key("movie-cards", CARDS_VERSION)
+# Every card expires on its own (hash fields have no TTL), so a card that
+# raced with invalidation doesn't stay stale for longer than this.
+CARDS_TTL = SESSION_SPECIAL_CACHE_TTL
+# Stored cards are prefixed by their expiration time (unix seconds).
+EXPIRES_AT = struct.Struct("!I")
+
+# Packed rows larger than this are compressed (long plots). Smaller rows
+# gain too little to pay for decompression on every page.
+COMPRESS_THRESHOLD = 1024
+RAW_FORMAT = b"r"
+COMPRESSED_FORMAT = b"z"
+
+
+class CardGenres(tuple):
+    """Genres of a card, `all()` keeps templates written for querysets working."""
+
+    def all(self) -> "CardGenres":  # noqa: A003
+        return self
+
+
+class GenreCard(NamedTuple):
+    slug: str
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+    def get_absolute_url(self) -> str:
+        return reverse("movies_genre_list", kwargs={"slug": self.slug})
+
+
+class MovieCard(NamedTuple):
+    """
+    Fields of a movie shown by list templates (`movie_default_fields` and
+    genres), rendered in place of `Movie` instances. Tuples are built much
+    faster than model instances (or dataclasses) are unpickled.
+    """
+
+    id: int  # noqa: A003
+    title: str
+    imdb_rate: float
+    imdb_votes: int
+    poster: str
+    plot: str
+    age_mark: str
+    is_movie: bool
+    genres: CardGenres
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def __str__(self) -> str:
+        return self.title
+
+    def get_absolute_url(self) -> str:
+        if self.is_movie:
+            return reverse("movie_detail", kwargs={"pk": self.id})
+        return reverse("series_detail", kwargs={"pk": self.id})
+
+
+def pack_card(card: MovieCard) -> bytes:
+    """
+    Card as a tuple of plain values (no model state or prefetch caches),
+    compressed when it's large.
+    """
+
+    row = (*card[:-1], tuple(tuple(genre) for genre in card.genres))
+    data = pickle.dumps(row, pickle.HIGHEST_PROTOCOL)
+    if len(data) > COMPRESS_THRESHOLD:
+        return COMPRESSED_FORMAT + zlib.compress(data)
+    return RAW_FORMAT + data
+
+
+def unpack_card(data: bytes) -> MovieCard:
+    payload = data[1:]
+    if data[:1] == COMPRESSED_FORMAT:
+        payload = zlib.decompress(payload)
+    *fields, genres = pickle.loads(payload)  # noqa: S301
+    return MovieCard(*fields, CardGenres([_get_genre_card(*genre) for genre in genres]))
+
+
+def movie_to_card(movie: Movie) -> MovieCard:
+    """Card of a movie fetched with `MovieQueryBuilder` (genres prefetched)."""
+
+    fields = [getattr(movie, field) for field in MovieQueryBuilder.movie_default_fields]
+    genres = CardGenres(
+        [_get_genre_card(genre.slug, genre.name) for genre in movie.genres.all()]
+    )
+    return MovieCard(*fields, genres)
+
+
+def get_movie_cards(movie_ids: Iterable[int]) -> list[MovieCard]:
+    """
+    Cards of movies in the order of given ids. Cards are kept packed in
+    a Redis hash by movie id: a page is one HMGET, missing and expired cards
+    are fetched from the DB and stored.
+    """
+
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return []
+
+    now = int(time.time())
+    cards: dict[int, MovieCard] = {}
+    for movie_id, data in zip(movie_ids, redis_client.hmget(CARDS_KEY, movie_ids)):
+        if data is not None and EXPIRES_AT.unpack_from(data)[0] > now:
+            cards[movie_id] = unpack_card(data[EXPIRES_AT.size :])
+
+    missing_ids = [movie_id for movie_id in movie_ids if movie_id not in cards]
+    if missing_ids:
+        movies = MovieQueryBuilder(
+            filter_by={"pk__in": missing_ids}, distinct=False
+        ).build_queryset()
+        fetched = {movie.pk: movie_to_card(movie) for movie in movies.nocache()}
+        if fetched:
+            _store_cards(fetched, expires_at=now + CARDS_TTL)
+        cards.update(fetched)
+
+    return [cards[movie_id] for movie_id in movie_ids if movie_id in cards]
+
+
+def invalidate_movie_cards(movie_ids: Iterable[int] | None = None) -> None:
+    """
+    Drop cards of given movies (all cards if ids are not given) once the
+    current transaction is committed, so they aren't fetched again
+    from the data that is being changed.
+    """
+
+    if movie_ids is None:
+        transaction.on_commit(lambda: redis_client.delete(CARDS_KEY))
+        return
+
+    movie_ids = list(movie_ids)
+    if movie_ids:
+        transaction.on_commit(lambda: redis_client.hdel(CARDS_KEY, *movie_ids))
+
+
+def _store_cards(cards: dict[int, MovieCard], expires_at: int) -> None:
+    prefix = EXPIRES_AT.pack(expires_at)
+    with redis_client.pipeline(transaction=False) as pipeline:
+        pipeline.hset(
+            CARDS_KEY,
+            mapping={
+                movie_id: prefix + pack_card(card) for movie_id, card in cards.items()
+            },
+        )
+        # The hash itself goes away once it's not written for a while.
+        pipeline.expire(CARDS_KEY, CARDS_TTL)
+        pipeline.execute()
+
+
+_genre_cards: dict[tuple[str, str], GenreCard] = {}
+
+
+def _get_genre_card(slug: str, name: str) -> GenreCard:
+    """Genre cards are few, they are shared by all movie cards of the worker."""
+
+    key = (slug, name)
+    card = _genre_cards.get(key)
+    if card is None:
+        card = _genre_cards[key] = GenreCard(slug, name)
+    return card
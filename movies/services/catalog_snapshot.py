@@ -0,0 +1,257 @@
+from typing import Sequence
+
+import logging
+import math
+import numpy as np
+import os
+import shutil
+import threading
+import time
+from datetime import time as dt_time
+from django.http import QueryDict
+from pathlib import Path
+
+from config.settings.base import CATALOG_SNAPSHOT_CHECK_INTERVAL, CATALOG_SNAPSHOT_DIR
+from movies.models import Movie
+
+logger = logging.getLogger(__name__)
+
+CURRENT_LINK = "current"
+# Missing runtime/release, values are non-negative otherwise.
+NULL_VALUE = -1
+
+COLUMNS = {
+    "id": np.uint32,
+    "year": np.int16,
+    "imdb_rate": np.float64,
+    "imdb_votes": np.int64,
+    "runtime": np.int32,
+    "release": np.int32,
+}
+# Range filter params: param -> (column, is lower bound).
+RANGE_PARAMS = {
+    "year__gt": ("year", True),
+    "year__lt": ("year", False),
+    "imdb_rate__gt": ("imdb_rate", True),
+    "imdb_rate__lt": ("imdb_rate", False),
+    "imdb_vote__gt": ("imdb_votes", True),
+    "imdb_vote__lt": ("imdb_votes", False),
+    "runtime__gt": ("runtime", True),
+    "runtime__lt": ("runtime", False),
+}
+SORT_COLUMNS = {"year", "imdb_rate", "imdb_votes"}
+DEFAULT_ORDERING = "-imdb_votes"
+
+
+class SnapshotResult(Sequence):
+    """
+    Ids of matched movies in the requested ordering. Only the slice that is
+    read gets sorted (top-k by partition), so paginating a large result
+    doesn't sort all of it.
+    """
+
+    def __init__(
+        self, movie_ids: np.ndarray, sort_keys: np.ndarray, tie_breakers: np.ndarray
+    ) -> None:
+        self._movie_ids = movie_ids
+        self._sort_keys = sort_keys
+        self._tie_breakers = tie_breakers
+
+    def __len__(self) -> int:
+        return len(self._movie_ids)
+
+    def __getitem__(self, item: int | slice) -> list[int] | int:  # type: ignore
+        if isinstance(item, int):
+            return self[item : item + 1][0]  # type: ignore
+
+        start, stop, _ = item.indices(len(self))
+        if start >= stop:
+            return []
+        positions = self._top_k(stop)[start:stop]
+        return self._movie_ids[positions].tolist()
+
+    def _top_k(self, k: int) -> np.ndarray:
+        """Positions of the first `k` movies by ascending (sort key, tie breaker)."""
+
+        keys = self._sort_keys
+        if k < len(keys):
+            kth = np.partition(keys, k - 1)[k - 1]
+            candidates = np.flatnonzero(keys <= kth)
+        else:
+            candidates = np.arange(len(keys))
+        order = np.lexsort((self._tie_breakers[candidates], keys[candidates]))
+        return candidates[order[:k]]
+
+
+class CatalogSnapshot:
+    """
+    Columnar snapshot of numeric movie columns, stored as `.npy` files
+    (one per column, rows ordered by id) and memory-mapped read-only,
+    so all workers of the host share it through the page cache.
+    Built by `build_catalog_snapshot` command.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.columns = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def filter(self, params: QueryDict) -> SnapshotResult | None:
+        """
+        Ids of movies matching range filters in the requested ordering.
+        None means params can't be answered by the snapshot. The snapshot is
+        rebuilt periodically, so listings without range filters (the default
+        catalog page) are left to the DB rather than served stale.
+        """
+
+        ranges: list[tuple[str, bool, float]] = []
+        ordering = DEFAULT_ORDERING
+        for param in params:
+            # The last value of a param is used, as filter forms do.
+            value = params[param]
+            if value == "":
+                continue
+            if param in RANGE_PARAMS:
+                bound = _parse_bound(param, value)
+                if bound is None:
+                    return None
+                ranges.append((*RANGE_PARAMS[param], bound))
+            elif param == "sort_by" and value.lstrip("-") in SORT_COLUMNS:
+                ordering = value
+            else:
+                return None
+        if not ranges:
+            return None
+
+        matched = np.ones(len(self), dtype=bool)
+        for column, is_lower_bound, bound in ranges:
+            values = self.columns[column]
+            if is_lower_bound:
+                matched &= values >= bound
+            else:
+                matched &= values <= bound
+            if column in ("runtime", "release"):
+                matched &= values != NULL_VALUE
+
+        positions = np.flatnonzero(matched)
+        movie_ids = self.columns["id"][positions].astype(np.int64)
+        sort_keys = self.columns[ordering.lstrip("-")][positions].astype(np.float64)
+
+        # Ascending keys: descending ordering negates values and ids.
+        if ordering.startswith("-"):
+            return SnapshotResult(movie_ids, -sort_keys, -movie_ids)
+        return SnapshotResult(movie_ids, sort_keys, movie_ids)
+
+
+def build_catalog_snapshot(directory: Path = CATALOG_SNAPSHOT_DIR) -> Path:
+    """
+    Write a new snapshot and atomically switch the `current` link to it.
+    Older snapshots except the previous one are removed (workers that still
+    map them keep the data until they switch).
+    """
+
+    movies = (
+        Movie.objects.nocache()
+        .order_by("pk")
+        .values_list("pk", "year", "imdb_rate", "imdb_votes", "runtime", "release")
+    )
+    rows: dict[str, list] = {name: [] for name in COLUMNS}
+    for movie_id, year, imdb_rate, imdb_votes, runtime, release in movies.iterator(
+        chunk_size=10000
+    ):
+        rows["id"].append(movie_id)
+        rows["year"].append(year)
+        rows["imdb_rate"].append(imdb_rate)
+        rows["imdb_votes"].append(imdb_votes)
+        rows["runtime"].append(
+            _time_to_seconds(runtime) if runtime is not None else NULL_VALUE
+        )
+        rows["release"].append(
+            release.toordinal() if release is not None else NULL_VALUE
+        )
+
+    directory.mkdir(parents=True, exist_ok=True)
+    directory = directory.resolve()
+    path = directory / f"snapshot-{time.time_ns()}"
+    path.mkdir()
+    for name, dtype in COLUMNS.items():
+        np.save(path / f"{name}.npy", np.array(rows[name], dtype=dtype))
+
+    link = directory / CURRENT_LINK
+    previous = link.resolve() if link.is_symlink() else None
+    temporary_link = directory / f"{CURRENT_LINK}.{os.getpid()}"
+    temporary_link.symlink_to(path.name)
+    os.replace(temporary_link, link)
+
+    for old_path in directory.glob("snapshot-*"):
+        if old_path not in (path, previous):
+            shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+def _time_to_seconds(value: dt_time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _parse_bound(param: str, value: str) -> float | None:
+    """Bound of a range filter, None if the filter form would reject it."""
+
+    try:
+        if param.startswith("runtime"):
+            return _time_to_seconds(dt_time.fromisoformat(value))
+        bound = float(value)
+    except ValueError:
+        return None
+    return bound if math.isfinite(bound) else None
+
+
+_snapshot: CatalogSnapshot | None = None
+_snapshot_checked_at: float | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_snapshot() -> CatalogSnapshot | None:
+    """
+    Get the current snapshot, remapped when the `current` link is switched
+    to a new one. None means there is no snapshot and queries go to the DB.
+    """
+
+    global _snapshot, _snapshot_checked_at  # noqa: WPS420
+
+    if not _is_expired(_snapshot_checked_at):
+        return _snapshot
+
+    with _snapshot_lock:
+        if _is_expired(_snapshot_checked_at):
+            _snapshot = _load_snapshot(_snapshot)
+            _snapshot_checked_at = time.monotonic()
+    return _snapshot
+
+
+def _is_expired(checked_at: float | None) -> bool:
+    if checked_at is None:
+        return True
+    return time.monotonic() - checked_at > CATALOG_SNAPSHOT_CHECK_INTERVAL
+
+
+def _load_snapshot(snapshot: CatalogSnapshot | None) -> CatalogSnapshot | None:
+    link = CATALOG_SNAPSHOT_DIR / CURRENT_LINK
+    if not link.exists():
+        return None
+
+    path = link.resolve()
+    if snapshot is not None and snapshot.path == path:
+        return snapshot
+
+    try:
+        snapshot = CatalogSnapshot(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Catalog snapshot {path} can't be loaded: {e}")
+        return snapshot
+
+    logger.info(f"Catalog snapshot {path} mapped: {len(snapshot)} movies.")
+    return snapshot
@@ -0,0 +1,371 @@
+from typing import Iterable, Iterator
+
+import logging
+import numpy as np
+from array import array
+from cacheops.redis import redis_client
+from django.contrib.contenttypes.models import ContentType
+from scipy import sparse
+
+from accounts.models import Profile
+from common.cache.redis import make_key
+from movies.models import Movie, Rating, Vote
+from movies.services.recommendations import select_top_k
+
+logger = logging.getLogger(__name__)
+
+USER_RECOMMENDATIONS_KEY = make_key("user-recommendations")
+ITEM_NEIGHBOURS_KEY = make_key("item-neighbours")
+CHANGED_USERS_KEY = make_key("user-recommendations", "changed")
+
+USER_RECOMMENDATIONS_TOP_N = 30
+ITEM_NEIGHBOURS_TOP_K = 50
+CHUNK_SIZE = 512
+REDIS_BATCH_SIZE = 1000
+
+# Weights of positive signals, other signals (dislikes, low rates)
+# only exclude the movie from recommendations of the user.
+MIN_POSITIVE_RATE = 6
+LIKE_WEIGHT = 1.0
+FAVORITE_WEIGHT = 1.0
+WATCHLIST_WEIGHT = 0.5
+
+
+class Interactions:
+    """
+    Sparse users x movies matrices built from rates, votes, favorites and
+    watchlists: weights of positive signals and all movies user interacted with.
+    """
+
+    def __init__(self) -> None:
+        self.user_ids = np.empty(0, dtype=np.uint32)
+        self.movie_ids = np.empty(0, dtype=np.uint32)
+        self.weights = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.seen = sparse.csr_matrix((0, 0), dtype=np.float32)
+
+        self._users = array("I")
+        self._movies = array("I")
+        self._weights = array("f")
+
+    def build(self, user_ids: Iterable[int] | None = None) -> None:
+        """Load signals of all users or given ones only."""
+
+        content_type = ContentType.objects.get_for_model(Movie)
+        signals = {
+            "rate": Rating.objects.nocache()
+            .filter(content_type=content_type)
+            .values_list("user_id", "object_id", "value"),
+            "vote": Vote.objects.nocache()
+            .filter(content_type=content_type)
+            .values_list("user_id", "object_id", "vote"),
+            "favorite": Profile.favorites.through.objects.values_list(
+                "profile__user_id", "movie_id"
+            ),
+            "watchlist": Profile.watchlist.through.objects.values_list(
+                "profile__user_id", "movie_id"
+            ),
+        }
+        user_field = {
+            "rate": "user_id__in",
+            "vote": "user_id__in",
+            "favorite": "profile__user_id__in",
+            "watchlist": "profile__user_id__in",
+        }
+
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            signals = {
+                name: queryset.filter(**{user_field[name]: user_ids})
+                for name, queryset in signals.items()
+            }
+
+        for name, queryset in signals.items():
+            for row in queryset.iterator(chunk_size=10000):
+                self._add(name, *row)
+
+        self._build_matrices()
+
+    def _add(self, signal: str, user_id: int, movie_id: int, value: int = 0) -> None:
+        if signal == "rate":
+            weight = value / 10 if value and value >= MIN_POSITIVE_RATE else 0
+        elif signal == "vote":
+            weight = LIKE_WEIGHT if value == Vote.LIKE else 0
+        elif signal == "favorite":
+            weight = FAVORITE_WEIGHT
+        else:
+            weight = WATCHLIST_WEIGHT
+
+        self._users.append(user_id)
+        self._movies.append(movie_id)
+        self._weights.append(weight)
+
+    def _build_matrices(self) -> None:
+        users = np.frombuffer(self._users, dtype=np.uint32)
+        movies = np.frombuffer(self._movies, dtype=np.uint32)
+        self.user_ids, rows = np.unique(users, return_inverse=True)
+        self.movie_ids, columns = np.unique(movies, return_inverse=True)
+        shape = (len(self.user_ids), len(self.movie_ids))
+
+        weights = np.frombuffer(self._weights, dtype=np.float32)
+        self.weights = sparse.csr_matrix((weights, (rows, columns)), shape=shape)
+        self.weights.eliminate_zeros()
+        self.seen = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=shape
+        )
+        self.seen.sum_duplicates()
+        self.seen.data[:] = 1
+
+        self._users = array("I")
+        self._movies = array("I")
+        self._weights = array("f")
+
+
+def compute_item_neighbours(
+    interactions: Interactions,
+    top_k: int = ITEM_NEIGHBOURS_TOP_K,
+    chunk_size: int = CHUNK_SIZE,
+) -> sparse.csr_matrix:
+    """
+    Item-kNN: cosine similarity of movies by users who liked them,
+    only `top_k` most similar movies are kept for every movie.
+    """
+
+    items = interactions.weights.T.tocsr()
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    items = (sparse.diags(1 / norms) @ items).astype(np.float32).tocsr()
+    items_transposed = items.T.tocsr()
+
+    n_movies = len(interactions.movie_ids)
+    neighbours_rows, neighbours_columns, neighbours_scores = [], [], []
+    for start in range(0, n_movies, chunk_size):
+        end = min(start + chunk_size, n_movies)
+        scores = (items[start:end] @ items_transposed).tocoo()
+        not_self = scores.col != scores.row + start
+        bounds, columns, values = select_top_k(
+            scores.row[not_self],
+            scores.col[not_self],
+            scores.data[not_self],
+            end - start,
+            top_k,
+        )
+        neighbours_rows.append(np.repeat(np.arange(start, end), np.diff(bounds)))
+        neighbours_columns.append(columns)
+        neighbours_scores.append(values)
+
+    if not neighbours_rows:
+        return sparse.csr_matrix((n_movies, n_movies), dtype=np.float32)
+    return sparse.csr_matrix(
+        (
+            np.concatenate(neighbours_scores),
+            (np.concatenate(neighbours_rows), np.concatenate(neighbours_columns)),
+        ),
+        shape=(n_movies, n_movies),
+        dtype=np.float32,
+    )
+
+
+def iter_user_recommendations(
+    interactions: Interactions,
+    neighbours: sparse.csr_matrix,
+    column_ids: np.ndarray,
+    top_n: int = USER_RECOMMENDATIONS_TOP_N,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield users with ids of recommended movies: neighbours of the movies user
+    liked, scored by similarity and user weights, without already seen ones.
+
+    `neighbours` rows are `interactions.movie_ids`, columns are `column_ids`.
+    """
+
+    seen = _reindex_columns(interactions.seen, interactions.movie_ids, column_ids)
+    for start in range(0, len(interactions.user_ids), chunk_size):
+        end = min(start + chunk_size, len(interactions.user_ids))
+        scores = interactions.weights[start:end] @ neighbours
+        scores = (scores - scores.multiply(seen[start:end])).tocoo()
+        scores.eliminate_zeros()
+
+        bounds, columns, _ = select_top_k(
+            scores.row, scores.col, scores.data, end - start, top_n
+        )
+        for position in range(end - start):
+            user_id = int(interactions.user_ids[start + position])
+            yield user_id, column_ids[columns[bounds[position] : bounds[position + 1]]]
+
+
+def build_user_recommendations() -> int:
+    """
+    Recompute item neighbours and recommendations of all users.
+    New hashes replace old ones atomically. Returns number of users.
+    """
+
+    redis_client.delete(CHANGED_USERS_KEY)
+    interactions = Interactions()
+    interactions.build()
+    neighbours = compute_item_neighbours(interactions)
+    logger.info(
+        f"Interactions: {interactions.weights.shape}, "
+        f"{interactions.seen.nnz} signals, {neighbours.nnz} neighbours."
+    )
+
+    building_key = f"{ITEM_NEIGHBOURS_KEY}:building"
+    redis_client.delete(building_key)
+    bounds = neighbours.indptr
+    stored = _store(
+        building_key,
+        (
+            (
+                int(movie_id),
+                _pack_neighbours(
+                    interactions.movie_ids[neighbours.indices[start:end]],
+                    neighbours.data[start:end],
+                ),
+            )
+            for movie_id, start, end in zip(
+                interactions.movie_ids, bounds[:-1], bounds[1:]
+            )
+            if end > start
+        ),
+    )
+    if stored:
+        redis_client.rename(building_key, ITEM_NEIGHBOURS_KEY)
+
+    building_key = f"{USER_RECOMMENDATIONS_KEY}:building"
+    redis_client.delete(building_key)
+    stored = _store(
+        building_key,
+        (
+            (user_id, movie_ids.astype("<u4").tobytes())
+            for user_id, movie_ids in iter_user_recommendations(
+                interactions, neighbours, interactions.movie_ids
+            )
+            if len(movie_ids)
+        ),
+    )
+    if stored:
+        redis_client.rename(building_key, USER_RECOMMENDATIONS_KEY)
+    return stored
+
+
+def refresh_user_recommendations() -> int:
+    """
+    Recompute recommendations of users whose signals changed since the last run,
+    with item neighbours of the last full build. Returns number of users.
+    """
+
+    # Users left by a failed run are merged, not replaced.
+    processing_key = f"{CHANGED_USERS_KEY}:processing"
+    with redis_client.pipeline() as pipeline:
+        pipeline.sunionstore(processing_key, [processing_key, CHANGED_USERS_KEY])
+        pipeline.delete(CHANGED_USERS_KEY)
+        pipeline.execute()
+    user_ids = [int(user_id) for user_id in redis_client.smembers(processing_key)]
+    if not user_ids:
+        return 0
+
+    interactions = Interactions()
+    interactions.build(user_ids=user_ids)
+    neighbours, column_ids = _load_neighbours(interactions.movie_ids)
+
+    recommendations = dict(
+        iter_user_recommendations(interactions, neighbours, column_ids)
+    )
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for user_id in user_ids:
+            movie_ids = recommendations.get(user_id)
+            if movie_ids is not None and len(movie_ids):
+                pipeline.hset(
+                    USER_RECOMMENDATIONS_KEY, user_id, movie_ids.astype("<u4").tobytes()
+                )
+            else:
+                pipeline.hdel(USER_RECOMMENDATIONS_KEY, user_id)
+        pipeline.delete(processing_key)
+        pipeline.execute()
+    return len(user_ids)
+
+
+def mark_users_changed(user_ids: Iterable[int]) -> None:
+    """Queue users for the incremental refresh of recommendations."""
+
+    user_ids = list(user_ids)
+    if user_ids:
+        redis_client.sadd(CHANGED_USERS_KEY, *user_ids)
+
+
+def get_user_recommended_ids(user_id: int) -> list[int]:
+    packed = redis_client.hget(USER_RECOMMENDATIONS_KEY, user_id)
+    if not packed:
+        return []
+    return np.frombuffer(packed, dtype="<u4").tolist()
+
+
+def _pack_neighbours(movie_ids: np.ndarray, scores: np.ndarray) -> bytes:
+    return movie_ids.astype("<u4").tobytes() + scores.astype("<f4").tobytes()
+
+
+def _load_neighbours(movie_ids: np.ndarray) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Stored neighbours of given movies as a sparse matrix: rows are `movie_ids`,
+    columns are returned ids (neighbours and the movies themselves).
+    """
+
+    rows, neighbour_ids, scores = [], [], []
+    for start in range(0, len(movie_ids), REDIS_BATCH_SIZE):
+        batch = [
+            int(movie_id) for movie_id in movie_ids[start : start + REDIS_BATCH_SIZE]
+        ]
+        for position, packed in enumerate(
+            redis_client.hmget(ITEM_NEIGHBOURS_KEY, batch)
+        ):
+            if not packed:
+                continue
+            size = len(packed) // 8
+            rows.append(np.full(size, start + position))
+            neighbour_ids.append(np.frombuffer(packed[: size * 4], dtype="<u4"))
+            scores.append(np.frombuffer(packed[size * 4 :], dtype="<f4"))
+
+    if not rows:
+        # Columns are the movies themselves, so shapes match `seen` matrix.
+        empty = sparse.csr_matrix((len(movie_ids), len(movie_ids)), dtype=np.float32)
+        return empty, movie_ids
+
+    column_ids, columns = np.unique(
+        np.concatenate([movie_ids, *neighbour_ids]), return_inverse=True
+    )
+    columns = columns[len(movie_ids) :]
+    neighbours = sparse.csr_matrix(
+        (np.concatenate(scores), (np.concatenate(rows), columns)),
+        shape=(len(movie_ids), len(column_ids)),
+        dtype=np.float32,
+    )
+    return neighbours, column_ids.astype(np.uint32)
+
+
+def _reindex_columns(
+    matrix: sparse.csr_matrix, ids: np.ndarray, new_ids: np.ndarray
+) -> sparse.csr_matrix:
+    """Move matrix columns labeled by sorted `ids` to sorted `new_ids` space."""
+
+    if len(ids) == len(new_ids) and np.array_equal(ids, new_ids):
+        return matrix
+    coo = matrix.tocoo()
+    return sparse.csr_matrix(
+        (coo.data, (coo.row, np.searchsorted(new_ids, ids[coo.col]))),
+        shape=(matrix.shape[0], len(new_ids)),
+    )
+
+
+def _store(key: str, items: Iterable[tuple[int, bytes]]) -> int:
+    stored = 0
+    mapping: dict[int, bytes] = {}
+    for item_id, packed in items:
+        mapping[item_id] = packed
+        if len(mapping) >= REDIS_BATCH_SIZE:
+            redis_client.hset(key, mapping=mapping)
+            stored += len(mapping)
+            mapping = {}
+    if mapping:
+        redis_client.hset(key, mapping=mapping)
+        stored += len(mapping)
+    return stored
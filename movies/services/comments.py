@@ -0,0 +1,39 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Page, Paginator
+from mptt.utils import get_cached_trees
+
+from movies.models import Cast, Comment, Movie
+
+COMMENT_THREADS_PER_PAGE = 20
+
+
+def get_comment_threads(
+    obj: Movie | Cast,
+    page_number: int | str | None = None,
+    per_page: int = COMMENT_THREADS_PER_PAGE,
+) -> Page:
+    """
+    Page of top-level comments of the object, with their whole reply trees.
+    Every thread is a separate MPTT tree, so the page is loaded with one query
+    by tree ids; replies are attached as cached children (`get_children()`
+    doesn't hit DB) and vote counters are stored on comments.
+    """
+
+    threads = (
+        Comment.objects.filter(
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.pk,
+            parent=None,
+        )
+        .order_by("tree_id")
+        .values_list("tree_id", flat=True)
+    )
+    page = Paginator(threads, per_page).get_page(page_number)
+
+    comments = (
+        Comment.objects.filter(tree_id__in=list(page.object_list))
+        .select_related("user")
+        .order_by("tree_id", "lft")
+    )
+    page.object_list = get_cached_trees(comments)
+    return page
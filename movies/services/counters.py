@@ -0,0 +1,99 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import (
+    Count,
+    F,
+    Model,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from movies.models import Rating, RatingCountersModel, Vote
+
+VOTE_COUNTER_FIELDS = {Vote.LIKE: "likes_count", Vote.DISLIKE: "dislikes_count"}
+
+
+def update_counters(obj: Model, **deltas: int) -> None:
+    """
+    Atomically shift denormalized counters of the object, e.g.
+    `update_counters(movie, likes_count=1, dislikes_count=-1)`.
+    """
+
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        type(obj).objects.filter(pk=obj.pk).update(
+            **{
+                field: Greatest(F(field) + delta, Value(0))
+                for field, delta in deltas.items()
+            }
+        )
+
+
+def get_vote_deltas(old_vote: int | None, new_vote: int | None) -> dict[str, int]:
+    """Counters changes caused by replacing user vote (None is no vote)."""
+
+    deltas = dict.fromkeys(VOTE_COUNTER_FIELDS.values(), 0)
+    if old_vote in VOTE_COUNTER_FIELDS:
+        deltas[VOTE_COUNTER_FIELDS[old_vote]] -= 1
+    if new_vote in VOTE_COUNTER_FIELDS:
+        deltas[VOTE_COUNTER_FIELDS[new_vote]] += 1
+    return deltas
+
+
+def get_rating_deltas(old_value: int | None, new_value: int | None) -> dict[str, int]:
+    """Counters changes caused by replacing user rate (None is no rate)."""
+
+    return {
+        "rating_sum": (new_value or 0) - (old_value or 0),
+        "rating_count": bool(new_value) - bool(old_value),
+    }
+
+
+def reconcile_counters(model: type[Model]) -> int:
+    """
+    Recount counters of the model from Vote/Rating rows,
+    fix the drifted ones and return their number.
+    """
+
+    content_type = ContentType.objects.get_for_model(model)
+    votes = Vote.objects.filter(content_type=content_type, object_id=OuterRef("pk"))
+    actual = {
+        "likes_count": _count(votes.filter(vote__gt=0)),
+        "dislikes_count": _count(votes.filter(vote__lt=0)),
+    }
+    if issubclass(model, RatingCountersModel):
+        ratings = Rating.objects.filter(
+            content_type=content_type, object_id=OuterRef("pk")
+        )
+        actual.update(
+            rating_sum=_aggregate(ratings, Sum("value")),
+            rating_count=_aggregate(ratings, Count("value")),
+        )
+
+    aliases = {f"actual_{field}": expression for field, expression in actual.items()}
+    drifted = Q()
+    for field in actual:
+        drifted |= ~Q(**{field: F(f"actual_{field}")})
+
+    drifted_ids = list(
+        model.objects.nocache()  # type: ignore
+        .alias(**aliases)
+        .filter(drifted)
+        .values_list("pk", flat=True)
+    )
+    if drifted_ids:
+        model.objects.filter(pk__in=drifted_ids).update(**actual)  # type: ignore
+    return len(drifted_ids)
+
+
+def _count(queryset: QuerySet) -> Coalesce:
+    return _aggregate(queryset, Count("pk"))
+
+
+def _aggregate(queryset: QuerySet, aggregate: Sum | Count) -> Coalesce:
+    subquery = queryset.order_by().values("object_id").annotate(value=aggregate)
+    return Coalesce(Subquery(subquery.values("value")), Value(0))
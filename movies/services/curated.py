@@ -0,0 +1,133 @@
+from typing import Callable
+
+from array import array
+from dataclasses import dataclass
+from django.db import transaction
+from django.db.models import QuerySet
+
+from common.cache.refresh import cached_refresh, get_or_refresh, invalidate, refresh
+from config.settings.base import SESSION_CACHE_TTL, SESSION_SPECIAL_CACHE_TTL
+from movies.services import services
+
+
+@dataclass(frozen=True)
+class CuratedList:
+    """
+    Ordered list of movie ids computed by a (heavy) queryset.
+    Querysets are built on refresh, so date ranges are always actual.
+    """
+
+    name: str
+    get_queryset: Callable[[], QuerySet]
+    limit: int
+    ttl: int = SESSION_SPECIAL_CACHE_TTL
+
+    @property
+    def cache_key(self) -> str:
+        return f"curated:{self.name}"
+
+    def build(self) -> array:
+        """Compute list ids, stored as compact array."""
+
+        queryset = self.get_queryset().nocache()
+        return array("I", queryset.values_list("pk", flat=True)[: self.limit])
+
+
+CURATED_LISTS = {
+    curated_list.name: curated_list
+    for curated_list in (
+        CuratedList("imdb-top", services.get_imdb_top, limit=1000),
+        CuratedList("classic-movies", services.get_top_classics, limit=300),
+        CuratedList("popular-movies", services.get_popular_movies, limit=300),
+        CuratedList("popular-series", services.get_popular_series, limit=300),
+        CuratedList(
+            "recent-premieres",
+            services.get_recent_premieres,
+            limit=100,
+            ttl=SESSION_CACHE_TTL * 4,
+        ),
+        CuratedList("new-movies-series", services.get_new_movies_and_series, limit=150),
+    )
+}
+
+
+def get_curated_ids(name: str) -> list[int]:
+    """
+    Get ordered movie ids of the curated list.
+    Missing list is computed in place, outdated one is served as is
+    and refreshed in background.
+    """
+
+    curated_list = CURATED_LISTS[name]
+    ids = get_or_refresh(
+        curated_list.cache_key, curated_list.build, ttl=curated_list.ttl
+    )
+    return ids.tolist()
+
+
+def refresh_curated_list(curated_list: CuratedList) -> None:
+    refresh(curated_list.cache_key, curated_list.build, ttl=curated_list.ttl)
+
+
+# Movie lists of genres, countries, years and collections, by ids.
+LIST_TTL = SESSION_SPECIAL_CACHE_TTL
+LIST_ORDERING = ("-imdb_votes", "-id")
+GENRE_LISTS = "lists:genre"
+COUNTRY_LISTS = "lists:country"
+YEAR_LISTS = "lists:year"
+COLLECTION_LISTS = "lists:collection"
+
+
+def get_genre_ids(slug: str) -> list[int]:
+    return _get_genre_ids(slug).tolist()
+
+
+def get_country_ids(name: str) -> list[int]:
+    return _get_country_ids(name).tolist()
+
+
+def get_year_ids(year: int) -> list[int]:
+    return _get_year_ids(year).tolist()
+
+
+def get_collection_ids(collection_id: int) -> list[int]:
+    return _get_collection_ids(collection_id).tolist()
+
+
+def invalidate_lists(*names: str) -> None:
+    """
+    Outdate all lists of given kinds once the current transaction is
+    committed, they're rebuilt in background on access. Outdated earlier,
+    a rebuild started before the commit would store the old rows as fresh.
+    """
+
+    def invalidate_all() -> None:
+        for name in names:
+            invalidate(name, LIST_TTL)
+
+    transaction.on_commit(invalidate_all)
+
+
+@cached_refresh(GENRE_LISTS, ttl=LIST_TTL)
+def _get_genre_ids(slug: str) -> array:
+    return _build_ids(services.get_movies_list_by_genre(slug))
+
+
+@cached_refresh(COUNTRY_LISTS, ttl=LIST_TTL)
+def _get_country_ids(name: str) -> array:
+    return _build_ids(services.get_movies_list_by_country(name))
+
+
+@cached_refresh(YEAR_LISTS, ttl=LIST_TTL)
+def _get_year_ids(year: int) -> array:
+    return _build_ids(services.get_movies_list_by_years(year))
+
+
+@cached_refresh(COLLECTION_LISTS, ttl=LIST_TTL)
+def _get_collection_ids(collection_id: int) -> array:
+    return _build_ids(services.get_all_movies().filter(collection=collection_id))
+
+
+def _build_ids(queryset: QuerySet) -> array:
+    queryset = queryset.nocache().order_by(*LIST_ORDERING)
+    return array("I", queryset.values_list("pk", flat=True))
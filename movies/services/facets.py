@@ -0,0 +1,109 @@
+from typing import Any, Callable
+
+from dataclasses import dataclass
+from django.db.models import CharField, Count, F, Max, QuerySet, Value
+from django.db.models.functions import Cast
+from django.http import QueryDict
+from django_filters import FilterSet
+
+from movies.models import Movie, StreamingPlatform
+from movies.services.filters import AdvancedMovieFilter
+
+
+@dataclass(frozen=True)
+class Facet:
+    """
+    Facet counted over the movies selected by all filters except its own,
+    so the counts show what changing this facet would give.
+    `count` maps selected movies subquery to (facet, value, label, count) rows.
+    """
+
+    name: str
+    params: tuple[str, ...]
+    count: Callable[[str, QuerySet], QuerySet]
+
+
+def _count_values(queryset: QuerySet, facet: str, value: Any, label: Any) -> QuerySet:
+    return (
+        queryset.order_by()
+        .annotate(facet=Value(facet), value=value, label=label)
+        .values("facet", "value", "label")
+        .annotate(count=Count("*"))
+    )
+
+
+def _count_genres(facet: str, movies: QuerySet) -> QuerySet:
+    genres = Movie.genres.through.objects.filter(movie_id__in=movies)
+    return _count_values(genres, facet, F("genre__slug"), F("genre__name"))
+
+
+def _count_countries(facet: str, movies: QuerySet) -> QuerySet:
+    countries = Movie.countries.through.objects.filter(movie_id__in=movies)
+    return _count_values(countries, facet, F("country__name"), F("country__code"))
+
+
+def _count_platforms(facet: str, movies: QuerySet) -> QuerySet:
+    platforms = StreamingPlatform.objects.filter(movie_id__in=movies)
+    return _count_values(platforms, facet, F("service"), F("service"))
+
+
+def _count_age_marks(facet: str, movies: QuerySet) -> QuerySet:
+    movies = Movie.objects.filter(pk__in=movies)
+    return _count_values(movies, facet, F("age_mark"), F("age_mark"))
+
+
+def _count_years(facet: str, movies: QuerySet) -> QuerySet:
+    movies = Movie.objects.filter(pk__in=movies)
+    return _count_values(movies, facet, Cast("year", CharField()), Value(""))
+
+
+def _count_imdb_votes(facet: str, movies: QuerySet) -> QuerySet:
+    # Single row: the maximal number of votes (upper bound of the slider).
+    return (
+        Movie.objects.filter(pk__in=movies)
+        .order_by()
+        .annotate(facet=Value(facet))
+        .values("facet")
+        .annotate(
+            value=Cast(Max("imdb_votes"), CharField()),
+            label=Value(""),
+            count=Count("*"),
+        )
+    )
+
+
+FACETS = (
+    Facet("genres", ("genres",), _count_genres),
+    Facet("countries", ("countries",), _count_countries),
+    Facet("platforms", ("platforms",), _count_platforms),
+    Facet("age_marks", ("age_marks",), _count_age_marks),
+    Facet("years", ("year__gt", "year__lt"), _count_years),
+    Facet("imdb_votes", ("imdb_vote__gt", "imdb_vote__lt"), _count_imdb_votes),
+)
+
+
+def get_facet_counts(
+    params: QueryDict, filterset_class: type[FilterSet] = AdvancedMovieFilter
+) -> dict[str, list[dict]]:
+    """
+    Counts of every facet value for the current filters selection,
+    computed by a single UNION ALL query of grouped aggregates.
+    """
+
+    branches = []
+    for facet in FACETS:
+        facet_params = params.copy()
+        for param in (*facet.params, "sort_by"):
+            facet_params.pop(param, None)
+        movies = filterset_class(facet_params, queryset=Movie.objects.all()).qs
+
+        branch = facet.count(facet.name, movies.order_by().values("pk"))
+        branches.append(branch)
+
+    counts: dict[str, list[dict]] = {facet.name: [] for facet in FACETS}
+    for row in branches[0].union(*branches[1:], all=True):
+        if row["value"] is not None:
+            counts[row.pop("facet")].append(row)
+    for rows in counts.values():
+        rows.sort(key=lambda row: -row["count"])
+    return counts
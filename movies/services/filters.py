@@ -8,7 +8,7 @@ from django_filters import (
     TimeFilter,
 )
 
-from movies.models import Movie, StreamingPlatform
+from movies.models import Cast, Movie, StreamingPlatform
 
 BASE_FILTER_FIELDS = ["genres", "countries", "year", "imdb_rate", "sort_by"]
 
@@ -58,7 +58,7 @@ class AdvancedMovieFilter(MovieFilter):
     runtime__lt = TimeFilter(field_name="runtime", lookup_expr="lte")
 
     keywords = CharFilter(field_name="keywords", lookup_expr="icontains")
-    cast = CharFilter(field_name="actors__full_name", lookup_expr="icontains")
+    cast = CharFilter(field_name="full_name", method="filter_cast")
 
     class Meta:
         fields = BASE_FILTER_FIELDS + [
@@ -69,9 +69,17 @@ class AdvancedMovieFilter(MovieFilter):
             "actors",
         ]
 
+    @staticmethod
+    def filter_cast(queryset: QuerySet, name: str, value: str) -> QuerySet:
+        cast_members = Cast.objects.filter(
+            **{f"{name}__trigram_word_similar": value}
+        ).values("pk")
+        movies = Movie.actors.through.objects.filter(cast__in=cast_members)
+        return queryset.filter(pk__in=movies.values("movie_id"))
+
 
 class SearchFilter(FilterSet):
-    title = CharFilter(lookup_expr="icontains")
+    title = CharFilter(field_name="search_vector", lookup_expr="search")
 
     class Meta:
         model = Movie
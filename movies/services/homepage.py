@@ -0,0 +1,46 @@
+from typing import Any
+
+from common.cache.refresh import get_or_refresh, invalidate, refresh
+from config.settings.base import SESSION_CACHE_TTL
+from movies.services import services
+
+HOMEPAGE_CACHE_KEY = "homepage"
+HOMEPAGE_TTL = SESSION_CACHE_TTL * 4
+
+HOMEPAGE_SECTIONS = {
+    "index_slider_movies": (services.get_movies_slider, 12),
+    "best_movies": (services.get_top_fantasy, 3),
+    "new_releases": (services.get_recent_premieres, 18),
+    "popular_movies": (services.get_popular_movies, 18),
+    "popular_series": (services.get_popular_series, 18),
+    "cinema_movies": (services.get_cinema_movies, 6),
+}
+
+
+def get_homepage_context() -> dict[str, Any]:
+    """
+    Movies of all homepage sections.
+    Served from one precomputed payload, so steady state needs no SQL.
+    """
+
+    return get_or_refresh(HOMEPAGE_CACHE_KEY, build_homepage_context, HOMEPAGE_TTL)
+
+
+def build_homepage_context() -> dict[str, Any]:
+    """
+    Evaluate homepage sections with their prefetched relations,
+    so pickled movies are rendered without extra queries.
+    """
+
+    return {
+        section: list(get_movies(limit=limit).nocache())
+        for section, (get_movies, limit) in HOMEPAGE_SECTIONS.items()
+    }
+
+
+def refresh_homepage() -> None:
+    refresh(HOMEPAGE_CACHE_KEY, build_homepage_context, HOMEPAGE_TTL)
+
+
+def invalidate_homepage() -> None:
+    invalidate(HOMEPAGE_CACHE_KEY, HOMEPAGE_TTL)
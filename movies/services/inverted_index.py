@@ -0,0 +1,342 @@
+from typing import Iterable, Iterator
+
+import logging
+import math
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from heapq import nlargest
+
+from common.cache.changes import INITIAL_POSITION, SYNC_INTERVAL, ChangeLog
+from config.settings.base import (
+    SEARCH_INDEX_ENABLED,
+    SEARCH_INDEX_MAX_RESULTS,
+    SEARCH_INDEX_MEMORY_BUDGET,
+    SEARCH_INDEX_REFRESH_INTERVAL,
+)
+from movies.models import Movie
+from movies.services.search import WORD_RE
+
+logger = logging.getLogger(__name__)
+
+# Field weights are applied to term frequency (BM25F-like).
+TITLE_WEIGHT = 3
+KEYWORDS_WEIGHT = 2
+CAST_WEIGHT = 1
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over movie titles, keywords and cast names.
+    Every term has a sorted array of movie ids and a parallel array of weighted
+    term frequencies, so the index stays compact and is updated in place.
+    """
+
+    def __init__(self, memory_budget: int = SEARCH_INDEX_MEMORY_BUDGET) -> None:
+        self.memory_budget = memory_budget
+
+        self._postings: dict[str, array] = {}
+        self._frequencies: dict[str, array] = {}
+        self._terms: list[str] = []
+        self._doc_terms: dict[int, tuple[str, ...]] = {}
+        self._doc_lengths: dict[int, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @property
+    def memory_usage(self) -> int:
+        """Approximate size of the index in bytes."""
+
+        postings_size = sum(
+            posting.itemsize * len(posting) + frequencies.itemsize * len(frequencies)
+            for posting, frequencies in zip(
+                self._postings.values(), self._frequencies.values()
+            )
+        )
+        terms_size = sum(sys.getsizeof(term) for term in self._terms)
+        docs_size = sum(len(terms) * 8 for terms in self._doc_terms.values())
+        return postings_size + terms_size + docs_size
+
+    def build(self) -> None:
+        """
+        Build index from DB, raise `MemoryBudgetExceeded` if it gets too large.
+        """
+
+        documents: dict[int, Counter] = defaultdict(Counter)
+        for movie_id, terms in _iter_movie_terms():
+            documents[movie_id].update(terms)
+
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for movie_id in sorted(documents):
+            for term, frequency in documents[movie_id].items():
+                postings[term].append((movie_id, frequency))
+
+        with self._lock:
+            self._postings = {
+                term: array("I", (movie_id for movie_id, _ in items))
+                for term, items in postings.items()
+            }
+            self._frequencies = {
+                term: array("H", (min(freq, 0xFFFF) for _, freq in items))
+                for term, items in postings.items()
+            }
+            self._terms = sorted(self._postings)
+            self._doc_terms = {
+                movie_id: tuple(terms) for movie_id, terms in documents.items()
+            }
+            self._doc_lengths = {
+                movie_id: sum(terms.values()) for movie_id, terms in documents.items()
+            }
+            self._total_length = sum(self._doc_lengths.values())
+
+        self._check_memory_budget()
+
+    def update_movies(self, movie_ids: Iterable[int]) -> None:
+        """Re-index given movies, removed movies are dropped from the index."""
+
+        movie_ids = set(movie_ids)
+        documents: dict[int, Counter] = defaultdict(Counter)
+        for movie_id, terms in _iter_movie_terms(movie_ids=movie_ids):
+            documents[movie_id].update(terms)
+
+        with self._lock:
+            for movie_id in movie_ids:
+                self._remove_document(movie_id)
+            for movie_id, terms in documents.items():
+                self._add_document(movie_id, terms)
+
+    def remove_movies(self, movie_ids: Iterable[int]) -> None:
+        with self._lock:
+            for movie_id in movie_ids:
+                self._remove_document(movie_id)
+
+    def search(self, text: str, limit: int = SEARCH_INDEX_MAX_RESULTS) -> list[int]:
+        """
+        Get ids of movies matching all words of the text (as prefixes),
+        ordered by BM25 score.
+        """
+
+        words = WORD_RE.findall(text.lower())
+        if not words:
+            return []
+
+        with self._lock:
+            if not self._doc_lengths:
+                return []
+
+            avg_length = self._total_length / len(self._doc_lengths)
+            scores: dict[int, float] | None = None
+            for word in words:
+                word_scores = self._score_word(word, avg_length=avg_length)
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {
+                        movie_id: score + word_scores[movie_id]
+                        for movie_id, score in scores.items()
+                        if movie_id in word_scores
+                    }
+                if not scores:
+                    return []
+
+        return nlargest(limit, scores, key=scores.__getitem__)  # type: ignore
+
+    def _score_word(self, word: str, avg_length: float) -> dict[int, float]:
+        """BM25 scores of the movies containing any term starting with word."""
+
+        scores: dict[int, float] = defaultdict(float)
+        total_docs = len(self._doc_lengths)
+
+        for term in self._iter_prefixed_terms(word):
+            posting = self._postings[term]
+            idf = math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for movie_id, frequency in zip(posting, self._frequencies[term]):
+                length_norm = (
+                    1 - BM25_B + BM25_B * self._doc_lengths[movie_id] / avg_length
+                )
+                scores[movie_id] += (
+                    idf
+                    * frequency
+                    * (BM25_K1 + 1)
+                    / (frequency + BM25_K1 * length_norm)
+                )
+
+        return scores
+
+    def _iter_prefixed_terms(self, prefix: str) -> Iterator[str]:
+        position = bisect_left(self._terms, prefix)
+        while position < len(self._terms) and self._terms[position].startswith(prefix):
+            yield self._terms[position]
+            position += 1
+
+    def _add_document(self, movie_id: int, terms: Counter) -> None:
+        for term, frequency in terms.items():
+            if term not in self._postings:
+                self._postings[term] = array("I")
+                self._frequencies[term] = array("H")
+                insort(self._terms, term)
+
+            posting = self._postings[term]
+            position = bisect_left(posting, movie_id)
+            posting.insert(position, movie_id)
+            self._frequencies[term].insert(position, min(frequency, 0xFFFF))
+
+        self._doc_terms[movie_id] = tuple(terms)
+        self._doc_lengths[movie_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[movie_id]
+
+    def _remove_document(self, movie_id: int) -> None:
+        for term in self._doc_terms.pop(movie_id, ()):
+            posting = self._postings[term]
+            position = bisect_left(posting, movie_id)
+            del posting[position]
+            del self._frequencies[term][position]
+
+            if not posting:
+                del self._postings[term]
+                del self._frequencies[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+        self._total_length -= self._doc_lengths.pop(movie_id, 0)
+
+    def _check_memory_budget(self) -> None:
+        if self.memory_usage > self.memory_budget:
+            raise MemoryBudgetExceeded(
+                f"Search index takes {self.memory_usage} bytes, "
+                f"budget is {self.memory_budget} bytes."
+            )
+
+
+def _tokenize(text: str | None, weight: int) -> Counter:
+    terms: Counter = Counter()
+    for word in WORD_RE.findall(text.lower() if text else ""):
+        terms[word] += weight
+    return terms
+
+
+def _iter_movie_terms(
+    movie_ids: set[int] | None = None,
+) -> Iterator[tuple[int, Counter]]:
+    """Weighted terms of movies: title, keywords, actors and directors names."""
+
+    movies = Movie.objects.nocache().only("id", "title", "keywords")
+    actors = Movie.actors.through.objects.nocache()
+    directors = Movie.directors.through.objects.nocache()
+    if movie_ids is not None:
+        movies = movies.filter(pk__in=movie_ids)
+        actors = actors.filter(movie_id__in=movie_ids)
+        directors = directors.filter(movie_id__in=movie_ids)
+
+    for movie in movies.iterator(chunk_size=2000):
+        terms = _tokenize(movie.title, TITLE_WEIGHT)
+        for keyword in movie.keywords_as_list():
+            terms.update(_tokenize(keyword, KEYWORDS_WEIGHT))
+        yield movie.id, terms
+
+    for cast_relation in (actors, directors):
+        names = cast_relation.values_list("movie_id", "cast__full_name")
+        for movie_id, full_name in names.iterator(chunk_size=5000):
+            yield movie_id, _tokenize(full_name, CAST_WEIGHT)
+
+
+SEARCH_INDEX_CHANGES = ChangeLog("search-index")
+
+_index: InvertedIndex | None = None
+_index_checked_at: float | None = None
+_index_position = INITIAL_POSITION
+_index_synced_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> InvertedIndex | None:
+    """
+    Get the search index of the current worker, (re)building it when it's
+    missing or expired. None means search should go to the DB: index is disabled
+    or doesn't fit into the memory budget.
+    Movies changed by any worker are re-indexed from `SEARCH_INDEX_CHANGES`.
+    """
+
+    global _index, _index_checked_at, _index_position, _index_synced_at  # noqa: WPS420
+
+    if not SEARCH_INDEX_ENABLED:
+        return None
+
+    if not _is_expired(_index_checked_at) and not _is_sync_due():
+        return _index
+
+    with _index_lock:
+        if _is_expired(_index_checked_at) or not _sync_index():
+            _index_position = SEARCH_INDEX_CHANGES.get_position()
+            _index = _build_index()
+            _index_checked_at = _index_synced_at = time.monotonic()
+    return _index
+
+
+def update_search_index(movie_ids: Iterable[int]) -> None:
+    """
+    Re-index movies in search indexes of all workers once the transaction
+    is committed, removed movies are dropped from them.
+    """
+
+    SEARCH_INDEX_CHANGES.add(movie_ids)
+
+
+def _is_sync_due() -> bool:
+    # Disabled index has nothing to sync until it's rebuilt on expiration.
+    return _index is not None and time.monotonic() - _index_synced_at > SYNC_INTERVAL
+
+
+def _sync_index() -> bool:
+    """
+    Re-index movies changed since the index was built or synced,
+    False if the index has to be rebuilt instead.
+    """
+
+    global _index_position, _index_synced_at  # noqa: WPS420
+
+    if not _is_sync_due():
+        return True
+
+    changes = SEARCH_INDEX_CHANGES.read(_index_position)
+    if changes is None:
+        return False
+    _index_position, movie_ids = changes
+    if movie_ids:
+        _index.update_movies(movie_ids)  # type: ignore
+    _index_synced_at = time.monotonic()
+    return True
+
+
+def _is_expired(checked_at: float | None) -> bool:
+    if checked_at is None:
+        return True
+    return time.monotonic() - checked_at > SEARCH_INDEX_REFRESH_INTERVAL
+
+
+def _build_index() -> InvertedIndex | None:
+    index = InvertedIndex()
+    started_at = time.monotonic()
+    try:
+        index.build()
+    except MemoryBudgetExceeded as e:
+        logger.warning(f"Search index is disabled: {e}")
+        return None
+
+    logger.info(
+        f"Search index built in {time.monotonic() - started_at:.2f}s: "
+        f"{len(index)} movies, {index.memory_usage} bytes."
+    )
+    return index
@@ -1,6 +1,5 @@
 from django.db import models
-from django.db.models.aggregates import Count, Sum
-from random import randint
+from django.db.models.aggregates import Sum
 
 
 class VoteManager(models.Manager):
@@ -17,7 +16,4 @@ class VoteManager(models.Manager):
 
 
 class MovieManager(models.Manager):
-    def get_random_movie(self) -> models.QuerySet:
-        count = self.aggregate(count=Count("id"))["count"]
-        random_index = randint(0, count - 1)  # noqa: S311
-        return self.all()[random_index]  # type: ignore
+    pass
@@ -1,15 +1,31 @@
 from dataclasses import dataclass
-from django.db.models import QuerySet
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import BigIntegerField, F, Func, IntegerField, QuerySet, Value
 
 from movies.models import Movie
 
 
+class IdsPosition(Func):
+    """
+    Position of the row id in the given ids list.
+    Used to keep order of ids obtained outside of the DB (indexes, caches).
+    """
+
+    function = "array_position"
+    output_field = IntegerField()
+
+    def __init__(self, ids: list[int], field: str = "id") -> None:
+        ids_array = Value(list(ids), output_field=ArrayField(BigIntegerField()))
+        super().__init__(ids_array, F(field))
+
+
 @dataclass
 class MovieQueryBuilder:
     """Build Movie Queryset"""
 
     # Possible parameters
     additional_prefetch: list[str] | None = None
+    annotate: dict | None = None
     exclude: dict | None = None
     filter_by: dict | None = None
     order_by: list[str] | None = None
@@ -53,6 +69,9 @@ class MovieQueryBuilder:
         if self.filter_by:
             query = query.filter(**self.filter_by)
 
+        if self.annotate:
+            query = query.annotate(**self.annotate)
+
         if self.order_by:
             query = query.order_by(*self.order_by)
 
@@ -72,9 +91,10 @@ class MovieQueryBuilder:
     def _get_fields_to_obtain(self) -> tuple[list[str], list[str]]:
         """Get prefetch and raw fields to process in query"""
 
-        prefetch_fields = self.movie_default_prefetch
-        if self.additional_prefetch:
-            prefetch_fields += self.additional_prefetch
+        prefetch_fields = [
+            *self.movie_default_prefetch,
+            *(self.additional_prefetch or []),
+        ]
 
         fields = self.movie_default_fields + prefetch_fields
         return fields, prefetch_fields
@@ -0,0 +1,83 @@
+import math
+import random
+from cacheops.redis import redis_client
+
+from common.cache.redis import make_key
+from config.settings.base import SESSION_SPECIAL_CACHE_TTL
+from movies.models import Movie
+
+RANDOM_INDEX_TTL = SESSION_SPECIAL_CACHE_TTL
+RANDOM_INDEXES_KEY = make_key("random", "indexes")
+
+# Every built index contains this member, so an empty index differs from
+# an index that isn't built yet. IMDb rates are non-negative.
+BUILT_MARKER = 0
+BUILT_MARKER_SCORE = -1
+
+# Pick random member among the ones with score (IMDb rate) >= min rate:
+# they make a suffix of the sorted set, so it's a rank lookup, O(log N).
+# Returns nil if index isn't built, 0 (the marker) if no movie matches.
+PICK_SCRIPT = redis_client.register_script(
+    """
+    local total = redis.call("ZCARD", KEYS[1])
+    if total == 0 then
+        return nil
+    end
+    local matched = redis.call("ZCOUNT", KEYS[1], ARGV[1], "+inf")
+    if matched == 0 then
+        return 0
+    end
+    local rank = total - matched + math.floor(tonumber(ARGV[2]) * matched)
+    return redis.call("ZRANGE", KEYS[1], rank, rank)[1]
+    """
+)
+
+
+def get_random_movie_id(
+    is_movie: bool | None = None, genre: str | None = None, min_rate: float = 0
+) -> int | None:
+    """
+    Id of a random movie of given type and genre, with IMDb rate >= `min_rate`.
+    Movie ids are kept in Redis sorted sets by IMDb rate, one per type and genre,
+    so the pick doesn't scan the table. Returns None if no movie matches.
+    """
+
+    key = _get_key(is_movie, genre)
+    # Non-finite rate means no minimal rate (Redis rejects `nan` bounds).
+    min_rate = max(min_rate, 0) if math.isfinite(min_rate) else 0
+    args = [min_rate, random.random()]  # noqa: S311
+    movie_id = PICK_SCRIPT(keys=[key], args=args)
+    if movie_id is None:
+        _build_index(key, is_movie, genre)
+        movie_id = PICK_SCRIPT(keys=[key], args=args)
+    return int(movie_id) if movie_id else None
+
+
+def invalidate_random_indexes() -> None:
+    """Drop all built indexes, they are rebuilt on the next pick."""
+
+    keys = redis_client.smembers(RANDOM_INDEXES_KEY)
+    if keys:
+        redis_client.delete(RANDOM_INDEXES_KEY, *keys)
+
+
+def _get_key(is_movie: bool | None, genre: str | None) -> str:
+    kind = {None: "all", True: "movies", False: "series"}[is_movie]
+    return make_key("random", kind, genre.lower() if genre else "all")
+
+
+def _build_index(key: str, is_movie: bool | None, genre: str | None) -> None:
+    movies = Movie.objects.nocache()
+    if is_movie is not None:
+        movies = movies.filter(is_movie=is_movie)
+    if genre:
+        movies = movies.filter(genres__slug__iexact=genre)
+
+    mapping = {BUILT_MARKER: BUILT_MARKER_SCORE}
+    mapping.update(movies.values_list("pk", "imdb_rate").iterator(chunk_size=10000))
+    with redis_client.pipeline() as pipeline:
+        pipeline.delete(key)
+        pipeline.zadd(key, mapping)
+        pipeline.expire(key, RANDOM_INDEX_TTL)
+        pipeline.sadd(RANDOM_INDEXES_KEY, key)
+        pipeline.execute()
@@ -0,0 +1,221 @@
+from typing import Iterator
+
+import logging
+import numpy as np
+from array import array
+from cacheops.redis import redis_client
+from scipy import sparse
+
+from common.cache.redis import make_key
+from movies.models import Movie
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATIONS_KEY = make_key("recommendations")
+RECOMMENDATIONS_TOP_K = 12
+
+# Rows of the similarity matrix computed at once.
+CHUNK_SIZE = 256
+# Features shared by more movies (or by larger share of the catalog)
+# don't generate candidates, see `iter_top_k`.
+MAX_CANDIDATE_DF = 2000
+MAX_CANDIDATE_DF_RATIO = 0.02
+
+FEATURE_WEIGHTS = {
+    "director": 3.0,
+    "actor": 2.0,
+    "keyword": 1.5,
+    "genre": 1.0,
+    "country": 0.5,
+}
+
+
+class FeatureMatrix:
+    """
+    Sparse movies x features matrix: genres, countries, directors, actors and
+    keywords, weighted by feature group and IDF, rows are L2-normalized,
+    so dot product of two rows is their cosine similarity.
+    """
+
+    def __init__(self) -> None:
+        self.movie_ids = np.empty(0, dtype=np.uint32)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.df = np.empty(0, dtype=np.int64)
+
+        self._features: dict[tuple[str, int | str], int] = {}
+        self._feature_weights = array("f")
+        self._movies = array("I")
+        self._columns = array("I")
+
+    def build(self) -> None:
+        """Load features from DB, memory is linear in number of (movie, feature)."""
+
+        movies = Movie.objects.nocache().order_by("pk")
+        self.movie_ids = np.fromiter(
+            movies.values_list("pk", flat=True).iterator(chunk_size=10000),
+            dtype=np.uint32,
+        )
+
+        for movie_id, keywords in movies.values_list("pk", "keywords").iterator(
+            chunk_size=5000
+        ):
+            for keyword in (keywords or "").split(","):
+                if keyword.strip():
+                    self._add(movie_id, "keyword", keyword.strip().lower())
+
+        relations = {
+            "director": (Movie.directors.through, "cast_id"),
+            "actor": (Movie.actors.through, "cast_id"),
+            "genre": (Movie.genres.through, "genre_id"),
+            "country": (Movie.countries.through, "country_id"),
+        }
+        for group, (through, field) in relations.items():
+            pairs = through.objects.nocache().values_list("movie_id", field)
+            for movie_id, related_id in pairs.iterator(chunk_size=10000):
+                self._add(movie_id, group, related_id)
+
+        self._build_matrix()
+
+    def _add(self, movie_id: int, group: str, value: int | str) -> None:
+        column = self._features.get((group, value))
+        if column is None:
+            column = self._features[(group, value)] = len(self._features)
+            self._feature_weights.append(FEATURE_WEIGHTS[group])
+        self._movies.append(movie_id)
+        self._columns.append(column)
+
+    def _build_matrix(self) -> None:
+        rows = np.searchsorted(
+            self.movie_ids, np.frombuffer(self._movies, dtype=np.uint32)
+        )
+        columns = np.frombuffer(self._columns, dtype=np.uint32)
+        shape = (len(self.movie_ids), len(self._features))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=shape
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+
+        self.df = np.bincount(matrix.indices, minlength=shape[1])
+        idf = np.log((1 + shape[0]) / (1 + self.df)) + 1
+        weights = np.frombuffer(self._feature_weights, dtype=np.float32) * idf
+        matrix = matrix @ sparse.diags(weights.astype(np.float32))
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = (sparse.diags(1 / norms) @ matrix).astype(np.float32).tocsr()
+
+        # Raw features aren't needed anymore.
+        self._features.clear()
+        self._feature_weights = array("f")
+        self._movies = array("I")
+        self._columns = array("I")
+
+
+def iter_top_k(
+    features: FeatureMatrix,
+    top_k: int = RECOMMENDATIONS_TOP_K,
+    chunk_size: int = CHUNK_SIZE,
+    max_candidate_df: int = MAX_CANDIDATE_DF,
+) -> Iterator[tuple[np.ndarray, list[np.ndarray]]]:
+    """
+    Yield chunks of movie ids with ids of their most similar movies.
+
+    Candidates are the movies sharing at least one selective feature (used by
+    at most `max_candidate_df` movies), so a chunk of the similarity matrix has
+    at most `chunk_size * features per movie * max_candidate_df` entries,
+    whatever the catalog size. Common features (genres, countries) still
+    contribute to the cosine similarity of the candidates.
+    """
+
+    max_candidate_df = min(
+        max_candidate_df, max(2, int(len(features.movie_ids) * MAX_CANDIDATE_DF_RATIO))
+    )
+    selective = (features.df >= 2) & (features.df <= max_candidate_df)
+    candidate_matrix = (
+        features.matrix @ sparse.diags(selective.astype(np.float32))
+    ).tocsr()
+    candidate_matrix.eliminate_zeros()
+    common_matrix = (
+        features.matrix @ sparse.diags((~selective).astype(np.float32))
+    ).tocsr()
+    common_matrix.eliminate_zeros()
+    candidate_transposed = candidate_matrix.T.tocsr()
+
+    for start in range(0, len(features.movie_ids), chunk_size):
+        end = min(start + chunk_size, len(features.movie_ids))
+        scores = (candidate_matrix[start:end] @ candidate_transposed).tocoo()
+        rows, columns = scores.row, scores.col
+        not_self = columns != rows + start
+        rows, columns = rows[not_self], columns[not_self]
+
+        common_scores = common_matrix[rows + start].multiply(common_matrix[columns])
+        total = scores.data[not_self] + np.asarray(common_scores.sum(axis=1)).ravel()
+
+        bounds, columns, _ = select_top_k(rows, columns, total, end - start, top_k)
+        yield features.movie_ids[start:end], [
+            features.movie_ids[columns[bounds[i] : bounds[i + 1]]]
+            for i in range(end - start)
+        ]
+
+
+def select_top_k(
+    rows: np.ndarray, columns: np.ndarray, scores: np.ndarray, n_rows: int, top_k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep `top_k` highest scores in every row of a sparse (COO) matrix.
+    Returns row bounds, columns and scores, sorted by row and score desc:
+    row `i` is `columns[bounds[i]:bounds[i + 1]]`.
+    """
+
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    top = np.arange(len(rows)) - np.searchsorted(rows, rows) < top_k
+    rows, columns, scores = rows[top], columns[top], scores[top]
+    return np.searchsorted(rows, np.arange(n_rows + 1)), columns, scores
+
+
+def build_recommendations(
+    top_k: int = RECOMMENDATIONS_TOP_K,
+    chunk_size: int = CHUNK_SIZE,
+    max_candidate_df: int = MAX_CANDIDATE_DF,
+) -> int:
+    """
+    Precompute top-K similar movies for every movie and store them in Redis
+    hash as packed uint32 arrays. New hash replaces old one atomically.
+    Returns number of movies with recommendations.
+    """
+
+    features = FeatureMatrix()
+    features.build()
+    logger.info(
+        f"Feature matrix: {features.matrix.shape}, {features.matrix.nnz} values."
+    )
+
+    building_key = f"{RECOMMENDATIONS_KEY}:building"
+    redis_client.delete(building_key)
+    stored = 0
+    for movie_ids, similar_ids in iter_top_k(
+        features, top_k=top_k, chunk_size=chunk_size, max_candidate_df=max_candidate_df
+    ):
+        mapping = {
+            int(movie_id): similar.astype("<u4").tobytes()
+            for movie_id, similar in zip(movie_ids, similar_ids)
+            if len(similar)
+        }
+        if mapping:
+            redis_client.hset(building_key, mapping=mapping)
+            stored += len(mapping)
+
+    if stored:
+        redis_client.rename(building_key, RECOMMENDATIONS_KEY)
+    return stored
+
+
+def get_recommended_ids(movie_id: int) -> list[int]:
+    """Ids of the movies similar to the given one, most similar first."""
+
+    packed = redis_client.hget(RECOMMENDATIONS_KEY, movie_id)
+    if not packed:
+        return []
+    return np.frombuffer(packed, dtype="<u4").tolist()
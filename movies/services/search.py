@@ -0,0 +1,175 @@
+from typing import Any, Iterable
+
+import re
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    CombinedSearchQuery,
+    SearchQuery,
+    SearchVector,
+    SearchVectorExact,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.urls import reverse
+
+from common.cache.tags import cached_with_tags
+from config.settings.base import SESSION_CACHE_TTL
+from movies.models import Cast, Movie
+
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR_SOURCE_FIELDS = {"title", "keywords", "plot"}
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_QUERY_LENGTH = 100
+AUTOCOMPLETE_CACHED_PREFIX_LENGTH = 3
+# Trigram matching is meaningless for one or two chars, use plain prefix there.
+AUTOCOMPLETE_MIN_TRIGRAM_LENGTH = 3
+
+WORD_RE = re.compile(r"\w+")
+
+
+def build_search_query(text: str) -> SearchQuery:
+    """
+    Build full-text query where every word of the text is matched as a prefix,
+    so partially typed titles ("star wa") are found as well.
+    """
+
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return SearchQuery(text, config=SEARCH_CONFIG)
+
+    raw_query = " & ".join(f"{word}:*" for word in words)
+    return SearchQuery(raw_query, search_type="raw", config=SEARCH_CONFIG)
+
+
+@SearchVectorField.register_lookup
+class SearchVectorPrefixLookup(SearchVectorExact):
+    """
+    `search_vector__search=<text>` lookup, used by DRF `@` search fields.
+    """
+
+    lookup_name = "search"
+
+    def process_rhs(self, qn: Any, connection: Any) -> tuple[str, list]:
+        if not isinstance(self.rhs, (SearchQuery, CombinedSearchQuery)):
+            self.rhs = build_search_query(str(self.rhs))
+        return super().process_rhs(qn, connection)
+
+
+def _cast_names(related_name: str) -> Subquery:
+    """Space separated names of movie cast members for the given role."""
+
+    return Subquery(
+        Cast.objects.filter(**{related_name: OuterRef("pk")})
+        .values(related_name)
+        .annotate(names=StringAgg("full_name", delimiter=" "))
+        .values("names")
+    )
+
+
+def get_movie_search_vector() -> SearchVector:
+    """
+    Weighted search vector: title (A), keywords (B), cast names (C), plot (D).
+    """
+
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("keywords", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            _cast_names("movie_actors"),
+            _cast_names("movie_directors"),
+            weight="C",
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector("plot", weight="D", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(movie_ids: Iterable[int] | QuerySet) -> None:
+    """
+    Recalculate search vectors of the given movies.
+    """
+
+    Movie.objects.filter(pk__in=movie_ids).update(
+        search_vector=get_movie_search_vector()
+    )
+
+
+def autocomplete(text: str, limit: int = AUTOCOMPLETE_LIMIT) -> dict[str, list[dict]]:
+    """
+    Get movies and cast members suggestions for the search input.
+    Typo-tolerant thanks to trigram word similarity.
+    """
+
+    query = " ".join(text.lower().split())[:AUTOCOMPLETE_MAX_QUERY_LENGTH]
+    if not query:
+        return {"movies": [], "cast": []}
+
+    if len(query) <= AUTOCOMPLETE_CACHED_PREFIX_LENGTH:
+        return _get_prefix_suggestions(prefix=query, limit=limit)
+    return _get_suggestions(query=query, limit=limit)
+
+
+@cached_with_tags(
+    "autocomplete",
+    tags=lambda prefix, limit: ["movies", "cast"],
+    timeout=SESSION_CACHE_TTL,
+)
+def _get_prefix_suggestions(prefix: str, limit: int) -> dict[str, list[dict]]:
+    """
+    Short prefixes are few and requested on every first keystrokes,
+    so they are kept in cache.
+    """
+
+    return _get_suggestions(query=prefix, limit=limit)
+
+
+def _get_suggestions(query: str, limit: int) -> dict[str, list[dict]]:
+    movies = _match_similar(
+        Movie.objects.all(), field="title", query=query, order_by=["-imdb_votes"]
+    ).values("id", "title", "year", "is_movie")[:limit]
+    cast = _match_similar(
+        Cast.objects.all(), field="full_name", query=query, order_by=["full_name"]
+    ).values("id", "full_name")[:limit]
+
+    return {
+        "movies": [
+            {
+                "title": movie["title"],
+                "year": movie["year"],
+                "url": reverse(
+                    "movie_detail" if movie["is_movie"] else "series_detail",
+                    kwargs={"pk": movie["id"]},
+                ),
+            }
+            for movie in movies
+        ],
+        "cast": [
+            {
+                "full_name": member["full_name"],
+                "url": reverse("cast", kwargs={"pk": member["id"]}),
+            }
+            for member in cast
+        ],
+    }
+
+
+def _match_similar(
+    queryset: QuerySet, field: str, query: str, order_by: list[str]
+) -> QuerySet:
+    """
+    Filter queryset by trigram word similarity (GIN `gin_trgm_ops` index),
+    or by prefix for too short queries.
+    Results are not put into cacheops, every typed string is unique.
+    """
+
+    queryset = queryset.nocache()
+    if len(query) < AUTOCOMPLETE_MIN_TRIGRAM_LENGTH:
+        return queryset.filter(**{f"{field}__istartswith": query}).order_by(*order_by)
+
+    return (
+        queryset.filter(**{f"{field}__trigram_word_similar": query})
+        .annotate(similarity=TrigramWordSimilarity(query, field))
+        .order_by("-similarity", *order_by)
+    )
@@ -2,22 +2,21 @@ from typing import Any
 
 import locale
 import logging
-from cacheops import cached
 from collections import defaultdict
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth.base_user import AbstractBaseUser
-from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count, Max, Min, QuerySet, Sum
+from django.contrib.postgres.search import SearchRank
+from django.db.models import Count, F, Max, Min, QuerySet, prefetch_related_objects
 from django.db.transaction import atomic
-from django.forms import IntegerField, ModelChoiceField
-from django.shortcuts import get_object_or_404
-from random import choice
+from django.forms import CharField, IntegerField
+from service_objects.fields import ModelField
 from service_objects.services import Service
 
+from common.cache.tags import cached_with_tags
 from common.const import ALL_PLATFORMS_MAP, COUNTRY_PLATFORMS_MAP
-from config.settings.base import SESSION_LONG_CACHE_TTL, SESSION_SPECIAL_CACHE_TTL
 from movies.forms import CommentForm
 from movies.models import (
     Cast,
@@ -28,7 +27,14 @@ from movies.models import (
     StreamingPlatform,
     Vote,
 )
-from movies.services.query_builder import MovieQueryBuilder
+from movies.services.comments import get_comment_threads
+from movies.services.counters import get_rating_deltas, get_vote_deltas, update_counters
+from movies.services.inverted_index import get_search_index
+from movies.services.query_builder import IdsPosition, MovieQueryBuilder
+from movies.services.random_pick import get_random_movie_id
+from movies.services.recommendations import get_recommended_ids
+from movies.services.search import build_search_query
+from movies.services.user_lists import toggle_user_movie
 
 locale.setlocale(locale.LC_ALL, "")
 logger = logging.getLogger(__name__)
@@ -39,12 +45,23 @@ class GetMovieDetail(Service):
     Class to process data about movie detail and transmit necessary info to views.
     """
 
-    movie = ModelChoiceField(queryset=Movie.objects.all())
+    movie = ModelField(Movie)
     user = IntegerField()
+    comments_page = CharField(required=False)
+
+    prefetch_fields = [
+        "genres",
+        "countries",
+        "actors",
+        "directors",
+        "writers",
+        "streamingplatform_set",
+    ]
 
     def process(self) -> dict:
         movie = self.cleaned_data["movie"]
         user = self.cleaned_data["user"]
+        prefetch_related_objects([movie], *self.prefetch_fields)
 
         genres = self._get_genres(movie=movie)
         countries = self._get_countries(movie=movie)
@@ -52,11 +69,9 @@ class GetMovieDetail(Service):
         directors = self._get_directors(movie=movie)
         writers = self._get_writers(movie=movie)
         platforms = self._get_stream_platforms(movie=movie)
-        comments = movie.comments.all()
-        likes_count = movie.votes.likes().count()
-        dislikes_count = movie.votes.dislikes().count()
+        comments = get_comment_threads(movie, self.cleaned_data["comments_page"])
         rate_value = self._get_user_rate(movie=movie, user_id=user)
-        movies_to_discover = get_new_movies_and_series(limit=6)
+        movies_to_discover = get_similar_movies(movie.pk, limit=6)
 
         context = {
             "movie_id": movie.id,
@@ -84,9 +99,9 @@ class GetMovieDetail(Service):
             "writers": writers,
             "comments": comments,
             "platforms": platforms,
-            "likes_count": likes_count,
+            "likes_count": movie.likes_count,
             "rate_value": rate_value,
-            "dislikes_count": dislikes_count,
+            "dislikes_count": movie.dislikes_count,
             "movies_to_discover": movies_to_discover,
         }
 
@@ -97,7 +112,7 @@ class GetMovieDetail(Service):
         if user_id and user_id != -1:
             try:
                 return (
-                    Rating.objects.filter(object_id=movie.pk, user_id=user_id)
+                    movie.ratings.filter(user_id=user_id)
                     .values_list("value", flat=True)
                     .get()
                 )
@@ -126,8 +141,10 @@ class GetMovieDetail(Service):
 
     @staticmethod
     def _get_stream_platforms(movie: Movie) -> dict[str, list[StreamingPlatform]]:
-        services = StreamingPlatform.objects.filter(movie=movie)
-        services = sorted(services, key=lambda x: ALL_PLATFORMS_MAP[x.service])
+        services = sorted(
+            movie.streamingplatform_set.all(),
+            key=lambda x: ALL_PLATFORMS_MAP[x.service],
+        )
         service_map = defaultdict(list)
         for country, platforms in COUNTRY_PLATFORMS_MAP.items():
             for item in services:
@@ -142,14 +159,13 @@ class GetCastDetail(Service):
     Class to process data about cast member and transmit necessary info to views.
     """
 
-    member = ModelChoiceField(queryset=Cast.objects.all())
+    member = ModelField(Cast)
+    comments_page = CharField(required=False)
 
     def process(self) -> dict:
         member = self.cleaned_data["member"]
 
-        comments = member.comments.all()
-        likes_count = member.votes.likes().count()
-        dislikes_count = member.votes.dislikes().count()
+        comments = get_comment_threads(member, self.cleaned_data["comments_page"])
 
         role_movies = {
             "actor": member.movie_actors,
@@ -182,8 +198,8 @@ class GetCastDetail(Service):
             "movie_writers": role_movies["writer"].all(),
             "known_for": known_for,
             "comments": comments,
-            "likes_count": likes_count,
-            "dislikes_count": dislikes_count,
+            "likes_count": member.likes_count,
+            "dislikes_count": member.dislikes_count,
         }
 
         return context
@@ -195,16 +211,17 @@ class DataFilters:
     """
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:years", tags=lambda: ["movies"])
     def get_years() -> list[int]:
-        year_stats = Movie.objects.aggregate(Min("year"), Max("year"))
+        year_stats = Movie.objects.nocache().aggregate(Min("year"), Max("year"))
         return [year_stats["year__min"], year_stats["year__max"]]
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:countries", tags=lambda: ["countries"])
     def get_countries() -> list[dict[str, str]]:
         countries = (
-            Movie.objects.exclude(countries__name__exact=None)
+            Movie.objects.nocache()
+            .exclude(countries__name__exact=None)
             .values("countries__name", "countries__code")
             .annotate(countries_count=Count("countries__name"))
             .order_by("-countries_count")
@@ -212,35 +229,38 @@ class DataFilters:
         return list(countries)
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:genres", tags=lambda: ["genres"])
     def get_genres() -> list[dict[str, str]]:
         genres = (
-            Movie.objects.values("genres__name", "genres__slug")
+            Movie.objects.nocache()
+            .values("genres__name", "genres__slug")
             .annotate(genres_count=Count("genres__name"))
             .order_by("-genres_count")
         )
         return list(genres)
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:imdb_votes", tags=lambda: ["movies"])
     def get_imdb_votes() -> int:
-        return Movie.objects.order_by("-imdb_votes").first().imdb_votes  # type: ignore
+        return Movie.objects.nocache().order_by("-imdb_votes").first().imdb_votes  # type: ignore
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:age_marks", tags=lambda: ["movies"])
     def get_age_marks() -> list[dict[str, str]]:
         age_marks = (
-            Movie.objects.values("age_mark")
+            Movie.objects.nocache()
+            .values("age_mark")
             .annotate(age_marks_count=Count("age_mark"))
             .order_by("-age_marks_count")
         )
         return list(age_marks)
 
     @staticmethod
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
+    @cached_with_tags("filters:platforms", tags=lambda: ["platforms"])
     def get_platforms() -> list[dict[str, str]]:
         platforms = (
-            StreamingPlatform.objects.values("service")
+            StreamingPlatform.objects.nocache()
+            .values("service")
             .annotate(service_count=Count("service"))
             .order_by("-service_count")
         )
@@ -248,24 +268,13 @@ class DataFilters:
         return list(platforms)
 
 
-@cached(timeout=SESSION_LONG_CACHE_TTL)
-def get_collections() -> QuerySet:
+@cached_with_tags("collections", tags=lambda: ["collections"])
+def get_collections() -> list[Collection]:
     """
     Get collections of movies+serials for main page.
     """
 
-    return Collection.objects.filter(is_active=True)
-
-
-def get_movies_of_collection(collection: Collection) -> QuerySet:
-    """
-    Get all movies from collection.
-    """
-
-    movies = collection.movies.prefetch_related(
-        "directors", "writers", "actors", "countries", "genres"
-    ).order_by("-imdb_votes", "-imdb_rate")
-    return movies
+    return list(Collection.objects.nocache().filter(is_active=True))
 
 
 def get_all_movies() -> QuerySet:
@@ -469,48 +478,43 @@ def get_movies_list_by_country(country: str) -> QuerySet:
     return query_builder.build_queryset()
 
 
-def get_random_movie() -> Movie:
+def get_movies_by_ids(movie_ids: list[int]) -> QuerySet:
     """
-    Select random movie.
+    Get movies by ids, keeping order of the given ids.
     """
 
-    pks = Movie.objects.values_list("pk", flat=True)
-    random_pk = choice(pks)  # noqa: S311
-    return Movie.objects.get(pk=random_pk)
+    query_builder = MovieQueryBuilder(
+        filter_by={"pk__in": movie_ids},
+        annotate={"position": IdsPosition(movie_ids)},
+        order_by=["position"],
+        distinct=False,
+    )
+    return query_builder.build_queryset()
 
 
-def get_movie_of_month() -> QuerySet:
+def get_similar_movies(movie_id: int, limit: int) -> QuerySet:
     """
-    Get the best movies and series over the past month.
+    Get movies similar to the given one (precomputed by `build_recommendations`),
+    new movies and series if there are no recommendations yet.
     """
 
-    return (
-        Movie.objects.prefetch_related("genres")
-        .only(
-            "id",
-            "title",
-            "imdb_rate",
-            "imdb_votes",
-            "poster",
-            "plot",
-            "age_mark",
-            "is_movie",
-        )
-        .filter(
-            votes__liked_on__range=(
-                datetime.today() + relativedelta(months=-1),
-                datetime.today(),
-            ),
-            comments__commented_on__range=(
-                datetime.today() + relativedelta(months=-1),
-                datetime.today(),
-            ),
-        )
-        .annotate(votes_sum=Sum("votes__vote"), comments_count=Count("comments__text"))
-        .exclude(votes_sum=None)
-        .order_by("-votes_sum", "-comments_count")
-        .distinct()
-    )
+    movie_ids = get_recommended_ids(movie_id)[:limit]
+    if not movie_ids:
+        return get_new_movies_and_series(limit=limit)
+    return get_movies_by_ids(movie_ids)
+
+
+def get_random_movie(
+    is_movie: bool | None = None, genre: str | None = None, min_rate: float = 0
+) -> Movie | None:
+    """
+    Select random movie, optionally of given type, genre and minimal IMDb rate.
+    """
+
+    movie_id = get_random_movie_id(is_movie=is_movie, genre=genre, min_rate=min_rate)
+    if movie_id is None:
+        return None
+    return Movie.objects.filter(pk=movie_id).first()
 
 
 def add_comment(post_request: dict, obj: Movie | Cast) -> None:
@@ -547,21 +551,33 @@ def add_vote(
             object_id=obj.pk,
             user=user,
         )
+        old_vote = like_dislike.vote
         if like_dislike.vote is not vote_type:
             like_dislike.vote = vote_type
             like_dislike.save(update_fields=["vote"])
             result = True
         else:
             like_dislike.delete()
+            vote_type = None
             result = False
     except Vote.DoesNotExist:
         obj.votes.create(user=user, vote=vote_type)
+        old_vote = None
         result = True
 
+    update_counters(obj, **get_vote_deltas(old_vote, vote_type))
+    like_count, dislike_count = (
+        type(obj)
+        .objects.nocache()
+        .filter(pk=obj.pk)
+        .values_list("likes_count", "dislikes_count")
+        .get()
+    )
+
     context = {
         "result": result,
-        "like_count": obj.votes.likes().count(),
-        "dislike_count": obj.votes.dislikes().count(),
+        "like_count": like_count,
+        "dislike_count": dislike_count,
     }
 
     return context
@@ -579,6 +595,7 @@ def add_rate(
             object_id=obj.pk,
             user=user,
         )
+        old_value = rating.value
         if not rate_value:
             rating.delete()
             rate_value = None
@@ -586,7 +603,11 @@ def add_rate(
             rating.value = rate_value
             rating.save(update_fields=["value"])
     except Rating.DoesNotExist:
-        obj.ratings.create(user=user, value=rate_value)
+        if rate_value:
+            obj.ratings.create(user=user, value=rate_value)
+        old_value = None
+
+    update_counters(obj, **get_rating_deltas(old_value, rate_value))
 
     context = {"result_value": rate_value}
 
@@ -594,34 +615,33 @@ def add_rate(
 
 
 def add_favorite_movie(movie_id: int, user_id: int) -> None:
-    """Add movies in User favorite list."""
+    """Add movies in User favorite list (or remove if it's already there)."""
 
-    movie = get_object_or_404(Movie, pk=movie_id)
-    user = get_object_or_404(User, pk=user_id)
-    if user.profile.favorites.filter(pk=movie.pk).exists():  # type: ignore
-        user.profile.favorites.remove(movie)  # type: ignore
-    else:
-        user.profile.favorites.add(movie)  # type: ignore
+    toggle_user_movie(user_id=user_id, list_name="favorites", movie_id=movie_id)
 
 
 def add_watchlist_movie(movie_id: int, user_id: int) -> None:
-    """Add movies in User watchlist list."""
+    """Add movies in User watchlist list (or remove if it's already there)."""
 
-    movie = get_object_or_404(Movie, pk=movie_id)
-    user = get_object_or_404(User, pk=user_id)
-    if user.profile.watchlist.filter(pk=movie.pk).exists():  # type: ignore
-        user.profile.watchlist.remove(movie)  # type: ignore
-    else:
-        user.profile.watchlist.add(movie)  # type: ignore
+    toggle_user_movie(user_id=user_id, list_name="watchlist", movie_id=movie_id)
 
 
 def search_movie(title: str) -> QuerySet:
     """
-    Get all movies and series by specific query.
+    Get all movies and series by specific query, ranked by relevance.
+    Served by the in-process index when enabled, by full-text search otherwise.
     """
 
+    search_index = get_search_index()
+    if search_index is not None:
+        return get_movies_by_ids(search_index.search(title))
+
+    search_query = build_search_query(title)
     query_builder = MovieQueryBuilder(
-        filter_by={"title__icontains": title}, order_by=["-imdb_votes", "-imdb_rate"]
+        filter_by={"search_vector": search_query},
+        annotate={"rank": SearchRank(F("search_vector"), search_query)},
+        order_by=["-rank", "-imdb_votes", "-imdb_rate"],
+        distinct=False,
     )
 
     return query_builder.build_queryset()
@@ -0,0 +1,248 @@
+from typing import Iterable
+
+import logging
+import threading
+from cacheops.redis import redis_client
+from django.contrib.auth.models import AnonymousUser, User
+from django.db.models import Q
+
+from accounts.models import Profile
+from common.background import run_later
+from common.cache.redis import get_lock, make_key
+from config.settings.base import SESSION_LONG_CACHE_TTL
+from movies.models import Movie
+from movies.services.collaborative import mark_users_changed
+
+logger = logging.getLogger(__name__)
+
+USER_MOVIE_LISTS = {
+    "favorites": Profile.favorites.through,
+    "watchlist": Profile.watchlist.through,
+}
+
+# Every loaded set contains this member, so an empty list differs from
+# a list that isn't loaded into Redis yet. Movie ids start from 1.
+LOADED_MARKER = 0
+
+FLUSH_DELAY = 2
+FLUSH_BATCH_SIZE = 1000
+PENDING_KEY = make_key("user-movies", "pending")
+
+# Toggle membership and queue the change for the DB in one round-trip.
+# Returns 1 if movie is added, 0 if removed, -1 if set isn't loaded.
+TOGGLE_SCRIPT = redis_client.register_script(
+    """
+    if redis.call("EXISTS", KEYS[1]) == 0 then
+        return -1
+    end
+    local added = 1
+    if redis.call("SISMEMBER", KEYS[1], ARGV[1]) == 1 then
+        redis.call("SREM", KEYS[1], ARGV[1])
+        added = 0
+    else
+        redis.call("SADD", KEYS[1], ARGV[1])
+    end
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+    redis.call("RPUSH", KEYS[2], ARGV[2])
+    return added
+    """
+)
+
+# Load user list into the set unless it's already loaded (and maybe toggled
+# since by another request). Returns 1 if loaded, 0 if set already exists.
+LOAD_SCRIPT = redis_client.register_script(
+    """
+    if redis.call("EXISTS", KEYS[1]) == 1 then
+        return 0
+    end
+    for i = 2, #ARGV, 5000 do
+        redis.call("SADD", KEYS[1], unpack(ARGV, i, math.min(i + 4999, #ARGV)))
+    end
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+    return 1
+    """
+)
+
+_flush_timer: threading.Timer | None = None
+_flush_timer_lock = threading.Lock()
+
+
+def get_user_movie_ids(user: User | AnonymousUser, list_name: str) -> frozenset[int]:
+    """
+    Ids of movies in the user favorites/watchlist, read from Redis set.
+    Kept on the user instance for the request, so membership checks
+    of list cards are constant-time.
+    """
+
+    if not user.is_authenticated:
+        return frozenset()
+
+    cache_attr = f"_{list_name}_movie_ids"
+    if not hasattr(user, cache_attr):
+        setattr(user, cache_attr, _get_movie_ids(user.pk, list_name))
+    return getattr(user, cache_attr)
+
+
+def toggle_user_movie(user_id: int, list_name: str, movie_id: int) -> bool:
+    """
+    Add movie to the user list or remove it if it's already there.
+    Redis set is updated at once, DB is updated by a batched flush.
+    Returns whether movie is in the list now.
+    """
+
+    key = _get_key(list_name, user_id)
+    args = [movie_id, f"{list_name}:{user_id}:{movie_id}", SESSION_LONG_CACHE_TTL]
+    added = TOGGLE_SCRIPT(keys=[key, PENDING_KEY], args=args)
+    if added == -1:
+        _load_movie_ids(user_id, list_name)
+        added = TOGGLE_SCRIPT(keys=[key, PENDING_KEY], args=args)
+
+    _schedule_flush()
+    return bool(added)
+
+
+def flush_user_lists() -> int:
+    """
+    Write queued toggles to Profile lists, return number of processed toggles.
+    Final membership is taken from Redis sets, so toggles are idempotent
+    and their order within a batch doesn't matter.
+    """
+
+    lock = get_lock("user-movies-flush")
+    if not lock.acquire():
+        return 0
+
+    processed = 0
+    try:
+        while True:
+            with redis_client.pipeline() as pipeline:
+                pipeline.lrange(PENDING_KEY, 0, FLUSH_BATCH_SIZE - 1)
+                pipeline.ltrim(PENDING_KEY, FLUSH_BATCH_SIZE, -1)
+                entries, _ = pipeline.execute()
+            if not entries:
+                break
+
+            try:
+                _apply_toggles(entries)
+            except Exception:
+                redis_client.rpush(PENDING_KEY, *entries)
+                raise
+            processed += len(entries)
+    finally:
+        lock.release()
+
+    return processed
+
+
+def _get_key(list_name: str, user_id: int) -> str:
+    return make_key("user-movies", list_name, user_id)
+
+
+def _get_movie_ids(user_id: int, list_name: str) -> frozenset[int]:
+    members = redis_client.smembers(_get_key(list_name, user_id))
+    if not members:
+        return _load_movie_ids(user_id, list_name)
+    return frozenset(int(member) for member in members) - {LOADED_MARKER}
+
+
+def _load_movie_ids(user_id: int, list_name: str) -> frozenset[int]:
+    """
+    Load user list from DB into Redis set. If the set was loaded meanwhile
+    by another request, it's kept as is: it may hold toggles not yet flushed.
+    """
+
+    movie_ids = frozenset(
+        USER_MOVIE_LISTS[list_name]
+        .objects.filter(profile__user_id=user_id)
+        .values_list("movie_id", flat=True)
+    )
+
+    key = _get_key(list_name, user_id)
+    args = [SESSION_LONG_CACHE_TTL, LOADED_MARKER, *movie_ids]
+    if not LOAD_SCRIPT(keys=[key], args=args):
+        members = redis_client.smembers(key)
+        return frozenset(int(member) for member in members) - {LOADED_MARKER}
+    return movie_ids
+
+
+def _schedule_flush() -> None:
+    """Flush toggles shortly, at most one pending flush per worker."""
+
+    global _flush_timer  # noqa: WPS420
+
+    with _flush_timer_lock:
+        if _flush_timer is None or not _flush_timer.is_alive():
+            _flush_timer = run_later(FLUSH_DELAY, flush_user_lists)
+
+
+def _parse_toggle(entry: bytes) -> tuple[str, int, int] | None:
+    try:
+        list_name, user_id, movie_id = entry.decode().split(":")
+        toggle = (list_name, int(user_id), int(movie_id))
+    except ValueError:
+        return None
+    return toggle if list_name in USER_MOVIE_LISTS else None
+
+
+def _apply_toggles(entries: Iterable[bytes]) -> None:
+    toggles = {entry: _parse_toggle(entry) for entry in entries}
+    invalid = [entry for entry, toggle in toggles.items() if toggle is None]
+    if invalid:
+        logger.warning(f"Invalid user list toggles skipped: {invalid}")
+
+    changes = list({toggle for toggle in toggles.values() if toggle is not None})
+    if not changes:
+        return
+
+    with redis_client.pipeline(transaction=False) as pipeline:
+        for list_name, user_id, movie_id in changes:
+            pipeline.sismember(_get_key(list_name, user_id), LOADED_MARKER)
+            pipeline.sismember(_get_key(list_name, user_id), movie_id)
+        states = pipeline.execute()
+
+    profiles = dict(
+        Profile.objects.filter(
+            user_id__in={user_id for _, user_id, _ in changes}
+        ).values_list("user_id", "pk")
+    )
+    movies = set(
+        Movie.objects.filter(
+            pk__in={movie_id for _, _, movie_id in changes}
+        ).values_list("pk", flat=True)
+    )
+
+    to_add: dict[str, list] = {list_name: [] for list_name in USER_MOVIE_LISTS}
+    to_remove: dict[str, Q] = {list_name: Q() for list_name in USER_MOVIE_LISTS}
+    unknown: list[tuple[str, int, int]] = []
+    for position, (list_name, user_id, movie_id) in enumerate(changes):
+        is_loaded, is_member = states[position * 2], states[position * 2 + 1]
+        profile_id = profiles.get(user_id)
+        # Expired set holds no state to write, DB keeps the last flushed one.
+        if not is_loaded or profile_id is None:
+            continue
+
+        if movie_id not in movies:
+            unknown.append((list_name, user_id, movie_id))
+        elif is_member:
+            to_add[list_name].append((profile_id, movie_id))
+        else:
+            to_remove[list_name] |= Q(profile_id=profile_id, movie_id=movie_id)
+
+    for list_name, through in USER_MOVIE_LISTS.items():
+        if to_add[list_name]:
+            through.objects.bulk_create(
+                [
+                    through(profile_id=profile_id, movie_id=movie_id)
+                    for profile_id, movie_id in to_add[list_name]
+                ],
+                ignore_conflicts=True,
+            )
+        if to_remove[list_name]:
+            through.objects.filter(to_remove[list_name]).delete()
+
+    mark_users_changed({user_id for _, user_id, _ in changes})
+
+    for list_name, user_id, movie_id in unknown:
+        redis_client.srem(_get_key(list_name, user_id), movie_id)
+    if unknown:
+        logger.warning(f"Unknown movies removed from user lists: {unknown}")
@@ -0,0 +1,116 @@
+import threading
+import time
+from cacheops.redis import redis_client
+from collections import Counter
+from dataclasses import dataclass
+from django.urls import Resolver404, resolve, reverse
+
+from common.cache.redis import make_key
+from movies.services import services
+from movies.urls import catalogs_urlpatterns, filter_urlpatterns
+
+PAGE_HITS_KEY = make_key("page-hits")
+# Only the most requested pages are kept.
+PAGE_HITS_LIMIT = 1000
+PAGE_HITS_FLUSH_INTERVAL = 10
+# Set on requests of `warm_caches`, they aren't counted as page hits.
+WARMUP_HEADER = "HTTP_X_CACHE_WARMUP"
+
+# Filter endpoints answer only ajax requests, autocomplete needs a query.
+FILTER_URL_NAMES = tuple(
+    pattern.name for pattern in filter_urlpatterns if pattern.name != "get_autocomplete"
+)
+CATALOG_URL_NAMES = tuple(pattern.name for pattern in catalogs_urlpatterns)
+PAGE_URL_NAMES = frozenset(
+    {
+        "index",
+        "collections",
+        "movies_collection",
+        "movies_genre_list",
+        "movies_country_list",
+        "movies_years_list",
+        *CATALOG_URL_NAMES,
+    }
+)
+WARMABLE_URL_NAMES = PAGE_URL_NAMES.union(FILTER_URL_NAMES)
+
+_hits: Counter = Counter()
+_hits_flushed_at = time.monotonic()
+_hits_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class WarmupPage:
+    url: str
+    is_ajax: bool = False
+
+
+def get_catalog_pages() -> list[WarmupPage]:
+    """
+    Pages with cached catalog data: filter endpoints (requested by every
+    list page) first, then the home page, catalogs, collections, genres
+    and countries.
+    """
+
+    pages = [WarmupPage(reverse(name), is_ajax=True) for name in FILTER_URL_NAMES]
+    pages.append(WarmupPage(reverse("index")))
+    pages.extend(WarmupPage(reverse(name)) for name in CATALOG_URL_NAMES)
+    pages.append(WarmupPage(reverse("collections")))
+    pages.extend(
+        WarmupPage(reverse("movies_collection", kwargs={"pk": collection.pk}))
+        for collection in services.get_collections()
+    )
+    pages.extend(
+        WarmupPage(reverse("movies_genre_list", kwargs={"slug": genre["genres__slug"]}))
+        for genre in services.DataFilters.get_genres()
+        if genre["genres__slug"]
+    )
+    pages.extend(
+        WarmupPage(
+            reverse("movies_country_list", kwargs={"name": country["countries__name"]})
+        )
+        for country in services.DataFilters.get_countries()
+    )
+    return pages
+
+
+def get_top_pages(limit: int) -> list[WarmupPage]:
+    """The most requested pages, counted by `count_page_hit`."""
+
+    flush_page_hits()
+    pages = []
+    for path in redis_client.zrevrange(PAGE_HITS_KEY, 0, limit - 1):
+        path = path.decode()
+        try:
+            url_name = resolve(path).url_name
+        except Resolver404:
+            # Route was removed since the page was counted.
+            continue
+        pages.append(WarmupPage(path, is_ajax=url_name in FILTER_URL_NAMES))
+    return pages
+
+
+def count_page_hit(path: str) -> None:
+    """Count in-process, hits are added to Redis in batches."""
+
+    with _hits_lock:
+        _hits[path] += 1
+        should_flush = time.monotonic() - _hits_flushed_at > PAGE_HITS_FLUSH_INTERVAL
+    if should_flush:
+        flush_page_hits()
+
+
+def flush_page_hits() -> None:
+    global _hits_flushed_at  # noqa: WPS420
+
+    with _hits_lock:
+        hits = dict(_hits)
+        _hits.clear()
+        _hits_flushed_at = time.monotonic()
+
+    if hits:
+        with redis_client.pipeline(transaction=False) as pipeline:
+            for path, count in hits.items():
+                pipeline.zincrby(PAGE_HITS_KEY, count, path)
+            pipeline.zremrangebyrank(PAGE_HITS_KEY, 0, -PAGE_HITS_LIMIT - 1)
+            pipeline.execute()
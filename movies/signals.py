@@ -0,0 +1,373 @@
+from typing import Any, Iterable
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache.tags import invalidate_tags_on_commit
+from common.cache.versions import bump_versions
+from movies.models import (
+    Cast,
+    Collection,
+    Comment,
+    Country,
+    Genre,
+    Movie,
+    Rating,
+    StreamingPlatform,
+    Vote,
+)
+from movies.services.bitmap_index import expire_bitmap_index, update_bitmap_index
+from movies.services.cards import invalidate_movie_cards
+from movies.services.collaborative import mark_users_changed
+from movies.services.curated import (
+    COLLECTION_LISTS,
+    COUNTRY_LISTS,
+    GENRE_LISTS,
+    YEAR_LISTS,
+    invalidate_lists,
+)
+from movies.services.homepage import invalidate_homepage
+from movies.services.inverted_index import update_search_index
+from movies.services.random_pick import invalidate_random_indexes
+from movies.services.search import SEARCH_VECTOR_SOURCE_FIELDS, update_search_vectors
+
+
+def reindex_movies(movie_ids: Iterable[int]) -> None:
+    """Refresh search vectors and in-process search index of given movies."""
+
+    movie_ids = list(movie_ids)
+    if movie_ids:
+        update_search_vectors(movie_ids)
+        update_search_index(movie_ids)
+
+
+@receiver(post_save, sender=Movie)
+def reindex_movie(
+    sender: type[Movie],
+    instance: Movie,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    if update_fields and not SEARCH_VECTOR_SOURCE_FIELDS & update_fields:
+        return
+    reindex_movies([instance.pk])
+
+
+@receiver(post_delete, sender=Movie)
+def unindex_movie(sender: type[Movie], instance: Movie, **kwargs: Any) -> None:
+    update_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def expire_homepage(sender: type[Movie], **kwargs: Any) -> None:
+    invalidate_homepage()
+
+
+@receiver(post_save, sender=Cast)
+def reindex_cast_movies(
+    sender: type[Cast],
+    instance: Cast,
+    created: bool = False,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    if created or (update_fields and "full_name" not in update_fields):
+        return
+    movies = Movie.objects.filter(Q(actors=instance) | Q(directors=instance))
+    reindex_movies(movies.values_list("pk", flat=True).distinct())
+
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.directors.through)
+def reindex_movie_cast(
+    sender: type,
+    instance: Movie | Cast,
+    action: str,
+    reverse: bool,
+    pk_set: set[int] | None,
+    **kwargs: Any,
+) -> None:
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            reindex_movies([instance.pk])
+        return
+
+    # Cast member side: `pk_set` holds movie ids, except for `clear()`,
+    # where the affected movies have to be collected before removal.
+    if action == "pre_clear":
+        instance._cleared_movie_ids = list(  # type: ignore
+            sender.objects.filter(cast=instance).values_list("movie_id", flat=True)
+        )
+    elif action == "post_clear":
+        reindex_movies(getattr(instance, "_cleared_movie_ids", []))
+    elif action in ("post_add", "post_remove"):
+        reindex_movies(pk_set or [])
+
+
+def bump_related_version(content_type_id: int, object_id: int) -> None:
+    """Bump content version of the object referenced by generic relation."""
+
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is Comment:
+        comment = Comment.objects.filter(pk=object_id).values(
+            "content_type_id", "object_id"
+        )
+        for related in comment:
+            bump_related_version(related["content_type_id"], related["object_id"])
+    elif model is not None:
+        bump_versions(model, [object_id])
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=Cast)
+def bump_object_version(sender: type[Model], instance: Model, **kwargs: Any) -> None:
+    bump_versions(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Cast)
+def bump_cast_movies_version(
+    sender: type[Cast], instance: Cast, created: bool = False, **kwargs: Any
+) -> None:
+    if created:
+        return
+    movies = Movie.objects.filter(
+        Q(actors=instance) | Q(directors=instance) | Q(writers=instance)
+    )
+    bump_versions(Movie, movies.values_list("pk", flat=True).distinct())
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def bump_commented_object_version(
+    sender: type[Comment | Vote], instance: Comment | Vote, **kwargs: Any
+) -> None:
+    bump_related_version(instance.content_type_id, instance.object_id)
+
+
+@receiver(post_save, sender=StreamingPlatform)
+@receiver(post_delete, sender=StreamingPlatform)
+def bump_platform_movie_version(
+    sender: type[StreamingPlatform], instance: StreamingPlatform, **kwargs: Any
+) -> None:
+    bump_versions(Movie, [instance.movie_id])
+
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.directors.through)
+@receiver(m2m_changed, sender=Movie.writers.through)
+@receiver(m2m_changed, sender=Movie.genres.through)
+@receiver(m2m_changed, sender=Movie.countries.through)
+def bump_movie_relations_version(
+    sender: type,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: set[int] | None,
+    **kwargs: Any,
+) -> None:
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_versions(Movie, [instance.pk])
+        return
+
+    # Related side: `pk_set` holds movie ids, except for `clear()`.
+    if action == "pre_clear":
+        related_field = instance._meta.model_name  # noqa: WPS437
+        instance._cleared_version_movie_ids = list(  # type: ignore
+            sender.objects.filter(**{related_field: instance}).values_list(
+                "movie_id", flat=True
+            )
+        )
+    elif action == "post_clear":
+        bump_versions(Movie, getattr(instance, "_cleared_version_movie_ids", []))
+    elif action in ("post_add", "post_remove"):
+        bump_versions(Movie, pk_set or [])
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def mark_recommendations_changed(
+    sender: type[Rating | Vote], instance: Rating | Vote, **kwargs: Any
+) -> None:
+    if instance.content_type_id == ContentType.objects.get_for_model(Movie).pk:
+        mark_users_changed([instance.user_id])
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def expire_random_indexes(
+    sender: type[Movie], update_fields: frozenset[str] | None = None, **kwargs: Any
+) -> None:
+    if update_fields and not {"imdb_rate", "is_movie"} & update_fields:
+        return
+    invalidate_random_indexes()
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def expire_random_genre_indexes(sender: type, action: str, **kwargs: Any) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_random_indexes()
+
+
+@receiver(post_save, sender=Movie)
+def update_movie_filters(sender: type[Movie], instance: Movie, **kwargs: Any) -> None:
+    update_bitmap_index([instance.pk])
+
+
+@receiver(post_delete, sender=Movie)
+def remove_movie_filters(sender: type[Movie], instance: Movie, **kwargs: Any) -> None:
+    update_bitmap_index([instance.pk])
+
+
+@receiver(post_save, sender=StreamingPlatform)
+@receiver(post_delete, sender=StreamingPlatform)
+def update_platform_movie_filters(
+    sender: type[StreamingPlatform], instance: StreamingPlatform, **kwargs: Any
+) -> None:
+    update_bitmap_index([instance.movie_id])
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+@receiver(m2m_changed, sender=Movie.countries.through)
+def update_movie_relations_filters(
+    sender: type,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: set[int] | None,
+    **kwargs: Any,
+) -> None:
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        update_bitmap_index([instance.pk])
+    elif action == "post_clear":
+        expire_bitmap_index()
+    else:
+        update_bitmap_index(pk_set or [])
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def expire_movie_card(sender: type[Movie], instance: Movie, **kwargs: Any) -> None:
+    invalidate_movie_cards([instance.pk])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def expire_genre_cards(sender: type[Genre], **kwargs: Any) -> None:
+    invalidate_movie_cards()
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def expire_movie_genres_cards(
+    sender: type,
+    instance: Model,
+    action: str,
+    reverse: bool,
+    pk_set: set[int] | None,
+    **kwargs: Any,
+) -> None:
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_movie_cards([instance.pk])
+    elif action == "post_clear":
+        invalidate_movie_cards()
+    else:
+        invalidate_movie_cards(pk_set or [])
+
+
+# Tags of results cached with `cached_with_tags`.
+MOVIE_TAGGED_FIELDS = frozenset({"title", "year", "imdb_votes", "age_mark"})
+
+
+@receiver(post_save, sender=Movie)
+def invalidate_movie_tags(
+    sender: type[Movie],
+    created: bool = False,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    if created or not update_fields or MOVIE_TAGGED_FIELDS & update_fields:
+        invalidate_tags_on_commit("movies")
+
+
+@receiver(post_delete, sender=Movie)
+def invalidate_deleted_movie_tags(sender: type[Movie], **kwargs: Any) -> None:
+    invalidate_tags_on_commit(
+        "movies", "genres", "countries", "platforms", "collections"
+    )
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Movie.genres.through)
+def invalidate_genres_tags(sender: type, **kwargs: Any) -> None:
+    invalidate_tags_on_commit("genres")
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(m2m_changed, sender=Movie.countries.through)
+def invalidate_countries_tags(sender: type, **kwargs: Any) -> None:
+    invalidate_tags_on_commit("countries")
+
+
+@receiver(post_save, sender=StreamingPlatform)
+@receiver(post_delete, sender=StreamingPlatform)
+def invalidate_platforms_tags(sender: type, **kwargs: Any) -> None:
+    invalidate_tags_on_commit("platforms")
+
+
+@receiver(post_save, sender=Collection)
+@receiver(post_delete, sender=Collection)
+def invalidate_collections_tags(sender: type, **kwargs: Any) -> None:
+    invalidate_tags_on_commit("collections")
+
+
+@receiver(post_save, sender=Cast)
+@receiver(post_delete, sender=Cast)
+def invalidate_cast_tags(sender: type, **kwargs: Any) -> None:
+    invalidate_tags_on_commit("cast")
+
+
+# Movie lists by ids (`movies.services.curated`), ordered by votes.
+MOVIE_LISTS_FIELDS = frozenset({"year", "imdb_votes"})
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def expire_movie_lists(
+    sender: type[Movie],
+    created: bool = False,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    if created or not update_fields or MOVIE_LISTS_FIELDS & update_fields:
+        invalidate_lists(GENRE_LISTS, COUNTRY_LISTS, YEAR_LISTS, COLLECTION_LISTS)
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def expire_genre_lists(sender: type, action: str, **kwargs: Any) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_lists(GENRE_LISTS)
+
+
+@receiver(m2m_changed, sender=Movie.countries.through)
+def expire_country_lists(sender: type, action: str, **kwargs: Any) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_lists(COUNTRY_LISTS)
+
+
+@receiver(m2m_changed, sender=Collection.movies.through)
+def expire_collection_lists(sender: type, action: str, **kwargs: Any) -> None:
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_lists(COLLECTION_LISTS)
@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from movies.models import Cast, Country, Genre, Movie, StreamingPlatform
+
+SMALL_CAST_SIZE = 1
+LARGE_CAST_SIZE = 30
+
+
+def create_movie(name: str, cast_size: int) -> Movie:
+    """Movie with `cast_size` genres, countries, platforms and cast members."""
+
+    movie = Movie.objects.create(
+        title=name,
+        plot=f"Plot of {name}",
+        year=2000,
+        poster=f"https://example.com/{name}.jpg",
+        imdb_id=name,
+        imdb_link=f"https://www.imdb.com/title/{name}",
+        imdb_rate=7.5,
+        imdb_votes=1000,
+        age_mark="PG-13",
+    )
+    members = Cast.objects.bulk_create(
+        Cast(
+            imdb_id=f"{name}-cast-{number}",
+            full_name=f"Cast member {number}",
+            photo=f"https://example.com/{name}-cast-{number}.jpg",
+        )
+        for number in range(cast_size)
+    )
+    movie.actors.set(members)
+    movie.directors.set(members)
+    movie.writers.set(members)
+    movie.genres.set(
+        Genre.objects.bulk_create(
+            Genre(name=f"Genre {number}", slug=f"{name}-genre-{number}")
+            for number in range(cast_size)
+        )
+    )
+    movie.countries.set(
+        Country.objects.bulk_create(
+            Country(name=f"{name} country {number}", code=f"{name[-2:]}{number}")
+            for number in range(cast_size)
+        )
+    )
+    StreamingPlatform.objects.bulk_create(
+        StreamingPlatform(
+            service=f"Service {number}",
+            video_format="HD",
+            purchase_type="Subscription",
+            movie=movie,
+        )
+        for number in range(cast_size)
+    )
+    return movie
+
+
+@pytest.mark.django_db
+def test_movie_detail_queries_do_not_depend_on_cast_size(
+    client, django_assert_num_queries
+):
+    warmup_movie = create_movie("tt01", SMALL_CAST_SIZE)
+    small_movie = create_movie("tt02", SMALL_CAST_SIZE)
+    large_movie = create_movie("tt03", LARGE_CAST_SIZE)
+    # Content types and other per-process lookups are loaded on the first page.
+    assert (
+        client.get(reverse("movie_detail", args=[warmup_movie.pk])).status_code == 200
+    )
+
+    with CaptureQueriesContext(connection) as small_movie_queries:
+        response = client.get(reverse("movie_detail", args=[small_movie.pk]))
+    assert response.status_code == 200
+
+    with django_assert_num_queries(len(small_movie_queries)):
+        response = client.get(reverse("movie_detail", args=[large_movie.pk]))
+    assert response.status_code == 200
+    assert len(response.context["actors"]) == LARGE_CAST_SIZE
@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from movies.models import Movie, Rating
+
+AJAX_HEADERS = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+@pytest.fixture
+def movie() -> Movie:
+    return Movie.objects.create(
+        title="Movie",
+        plot="Plot",
+        year=2000,
+        poster="https://example.com/poster.jpg",
+        imdb_id="tt01",
+        imdb_link="https://www.imdb.com/title/tt01",
+        imdb_rate=7.5,
+        imdb_votes=1000,
+        age_mark="PG-13",
+    )
+
+
+@pytest.fixture
+def user_client(client):
+    client.force_login(User.objects.create_user(username="user", password="password"))
+    return client
+
+
+def rate(client, movie: Movie, value: str):
+    return client.post(
+        reverse("movie_rate", args=[movie.pk]), {"rate_value": value}, **AJAX_HEADERS
+    )
+
+
+def assert_rating(movie: Movie, value: int | None) -> None:
+    movie.refresh_from_db()
+    values = list(
+        Rating.objects.filter(object_id=movie.pk).values_list("value", flat=True)
+    )
+    assert values == ([value] if value else [])
+    assert movie.rating_sum == (value or 0)
+    assert movie.rating_count == (1 if value else 0)
+
+
+@pytest.mark.django_db
+def test_rate_movie_create_change_and_clear(user_client, movie):
+    response = rate(user_client, movie, "7")
+    assert response.status_code == 200
+    assert response.json() == {"result_value": 7}
+    assert_rating(movie, 7)
+
+    response = rate(user_client, movie, "9")
+    assert response.json() == {"result_value": 9}
+    assert_rating(movie, 9)
+
+    response = rate(user_client, movie, "")
+    assert response.json() == {"result_value": None}
+    assert_rating(movie, None)
+
+
+@pytest.mark.django_db
+def test_clear_missing_rate_does_not_create_it(user_client, movie):
+    assert rate(user_client, movie, "").status_code == 200
+    assert_rating(movie, None)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("value", ["0", "11", "seven", "7.5"])
+def test_rate_movie_rejects_invalid_value(user_client, movie, value):
+    assert rate(user_client, movie, value).status_code == 400
+    assert_rating(movie, None)
@@ -28,8 +28,10 @@ from movies.views import (
     RecentPremieresView,
     SearchMovieView,
     VoteView,
+    get_autocomplete,
     get_filter_age_mark,
     get_filter_countries,
+    get_filter_facets,
     get_filter_genres,
     get_filter_imdb_votes,
     get_filter_platforms,
@@ -97,6 +99,8 @@ filter_urlpatterns = [
     path("age_mark/", get_filter_age_mark, name="get_age_marks"),  # type: ignore
     path("genres/", get_filter_genres, name="get_genres"),  # type: ignore
     path("platforms/", get_filter_platforms, name="get_platforms"),  # type: ignore
+    path("facets/", get_filter_facets, name="get_facets"),  # type: ignore
+    path("autocomplete/", get_autocomplete, name="get_autocomplete"),  # type: ignore
 ]
 
 category_urlpatterns = [
@@ -138,8 +142,16 @@ urlpatterns = [
         name="advanced_movie_search_result",
     ),
     path("collections/", CollectionsView.as_view(), name="collections"),
-    path("favorite/<int:pk>", AddFavoriteMovieView.as_view(), name="movie_favorite"),
-    path("watchlist/<int:pk>", AddWatchlistMovieView.as_view(), name="movie_watchlist"),
+    path(
+        "favorite/<int:pk>",
+        login_required(AddFavoriteMovieView.as_view()),
+        name="movie_favorite",
+    ),
+    path(
+        "watchlist/<int:pk>",
+        login_required(AddWatchlistMovieView.as_view()),
+        name="movie_watchlist",
+    ),
     path("random/", RandomMovieView.as_view(), name="random_movie"),
     path("movie/<int:pk>", MovieDetailsView.as_view(), name="movie_detail"),
     path("series/<int:pk>", MovieDetailsView.as_view(), name="series_detail"),
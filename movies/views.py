@@ -1,18 +1,26 @@
-from typing import Any
+from typing import Any, Sequence
 
-from cacheops import cached
+import math
+from django.core.paginator import InvalidPage, Paginator
 from django.db.models import QuerySet
-from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, QueryDict
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic.base import View
 from django_filters.views import FilterView
 
+from common.cache.versions import cached_anonymous_page
+from common.mixins.pagination import KeysetPaginationMixin
+from common.pagination import CountingPaginator, count_rows
 from common.views import BaseView, is_ajax
-from config.settings.base import SESSION_LONG_CACHE_TTL, SESSION_SPECIAL_CACHE_TTL
-from movies.models import Cast, Collection, Movie
-from movies.services import services
+from movies.forms import RateForm
+from movies.models import Cast, Collection, Movie, MovieActivityRank
+from movies.services import activity, cards, curated, facets, homepage, search, services
+from movies.services.bitmap_index import get_bitmap_index
+from movies.services.catalog_snapshot import get_catalog_snapshot
 from movies.services.filters import AdvancedMovieFilter, MovieFilter, SearchFilter
 
+MOVIE_KEYSET_FIELDS = {"id", "imdb_votes", "imdb_rate", "year"}
+
 
 def error_403(
     request: HttpRequest, exception: type[Exception] | None = None
@@ -36,14 +44,7 @@ class MoviesBaseView(BaseView):
     """
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        context = {
-            "index_slider_movies": services.get_movies_slider(limit=12),
-            "best_movies": services.get_top_fantasy(limit=3),
-            "new_releases": services.get_recent_premieres(limit=18),
-            "popular_movies": services.get_popular_movies(limit=18),
-            "popular_series": services.get_popular_series(limit=18),
-            "cinema_movies": services.get_cinema_movies(limit=6),
-        }
+        context = homepage.get_homepage_context()
         return render(request, "movies/index.html", context)
 
 
@@ -58,8 +59,18 @@ class MovieDetailsView(BaseView):
     """Detailed information about the movie."""
 
     def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        return cached_anonymous_page(
+            request,
+            Movie,
+            pk,
+            lambda: self.render_page(request, pk),
+            allowed_params=["comments_page"],
+        )
+
+    @staticmethod
+    def render_page(request: HttpRequest, pk: int) -> HttpResponse:
         movie = get_object_or_404(Movie, pk=pk)
-        context = {"movie": movie.pk}
+        context = {"movie": movie, "comments_page": request.GET.get("comments_page")}
         context.update(
             {"user": request.user.id if request.user.is_authenticated else -1}  # type: ignore
         )
@@ -71,8 +82,20 @@ class CastMemberDetailsView(BaseView):
     """Detailed information about cast members."""
 
     def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        return cached_anonymous_page(
+            request,
+            Cast,
+            pk,
+            lambda: self.render_page(request, pk),
+            allowed_params=["comments_page"],
+        )
+
+    @staticmethod
+    def render_page(request: HttpRequest, pk: int) -> HttpResponse:
         cast_member = get_object_or_404(Cast, pk=pk)
-        context = services.GetCastDetail.execute({"member": cast_member.pk})
+        context = services.GetCastDetail.execute(
+            {"member": cast_member, "comments_page": request.GET.get("comments_page")}
+        )
         return render(request, "movies/cast_detail.html", context)
 
 
@@ -88,14 +111,36 @@ class RandomMovieView(BaseView):
     """Detailed information about random movie."""
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        movie = services.get_random_movie()
-        context = {"movie": movie.pk}
+        movie = services.get_random_movie(**self.get_filters())
+        if movie is None:
+            raise Http404("No movies match the filters.")
+        context = {"movie": movie, "comments_page": request.GET.get("comments_page")}
         context.update(
             {"user": request.user.id if request.user.is_authenticated else -1}  # type: ignore
         )
         context = services.GetMovieDetail.execute(context)
         return render(request, "movies/movie_detail.html", context)
 
+    def get_filters(self) -> dict[str, Any]:
+        """
+        Same params as movie list filters:
+        `?genres=fantasy&is_movie=true&imdb_rate__gt=7`.
+        """
+
+        params = self.request.GET
+        is_movie = {"true": True, "false": False}.get(params.get("is_movie", ""))
+        try:
+            min_rate = float(params.get("imdb_rate__gt") or 0)
+        except ValueError:
+            min_rate = 0
+        if not math.isfinite(min_rate):
+            min_rate = 0
+        return {
+            "is_movie": is_movie,
+            "genre": params.get("genres") or None,
+            "min_rate": min_rate,
+        }
+
 
 class AddFavoriteMovieView(View):
     """Add movie in User favorite list."""
@@ -115,53 +160,125 @@ class AddWatchlistMovieView(View):
             return HttpResponse("success")
 
 
-class MoviesOfCollectionView(FilterView):
-    """Displaying a list of movies of a certain collection."""
-
-    filterset_class = MovieFilter
-    paginate_by = 30
-    template_name = "movies/movie_list.html"
-
-    def get_collection(self) -> Collection:
-        return get_object_or_404(Collection, pk=self.kwargs["pk"])
+def paginate_ids(
+    movie_ids: Sequence[int], page_size: int, request: HttpRequest, page_kwarg: str
+) -> tuple:
+    """
+    Paginate ordered movie ids, only cards of the current page are loaded
+    (see `movies.services.cards`).
+    """
 
-    @cached(timeout=SESSION_SPECIAL_CACHE_TTL)
-    def get_queryset(self) -> QuerySet:
-        collection = self.get_collection()
-        queryset = services.get_movies_of_collection(collection=collection)
-        return queryset
+    paginator = Paginator(movie_ids, page_size)
+    try:
+        page = paginator.page(request.GET.get(page_kwarg) or 1)
+    except InvalidPage as e:
+        raise Http404(str(e))
 
-    def get_context_data(self, **kwargs: Any) -> dict:
-        context = super().get_context_data(**kwargs)
-        collection = self.get_collection()
-        context["page_title"] = f"{collection.name} Collection"
-        return context
+    page.object_list = cards.get_movie_cards(page.object_list)
+    return paginator, page, page.object_list, page.has_other_pages()
 
 
-class FilteredListView(FilterView):
+class FilteredListView(KeysetPaginationMixin, FilterView):
     """Base view for specific movie collection pages."""
 
     page_title = ""
     filterset_class = MovieFilter
     paginate_by = 18
+    keyset_fields = MOVIE_KEYSET_FIELDS
+    keyset_default_ordering = ("-imdb_votes",)
+    paginator_class = CountingPaginator
     template_name = "movies/movie_list.html"
 
     def get_context_data(self, **kwargs: Any) -> dict:
         context = super().get_context_data(**kwargs)
         context["page_title"] = self.page_title
-        context["objects_len"] = len(self.object_list)
+        context["objects_len"], context["objects_len_exact"] = self.get_objects_count()
         return context
 
+    def get_objects_count(self) -> tuple[int, bool]:
+        return count_rows(self.object_list)
+
+
+class CuratedListView(FilteredListView):
+    """
+    Base view for precomputed movie lists (see `movies.services.curated`).
+    Without active filters only movies of the current page are fetched by ids.
+    """
+
+    curated_list = ""
+    curated_ids: list[int] = []
+
+    def get_queryset(self) -> QuerySet:
+        self.curated_ids = self.get_curated_ids()
+        return services.get_movies_by_ids(self.curated_ids)
+
+    def get_curated_ids(self) -> list[int]:
+        return curated.get_curated_ids(self.curated_list)
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> tuple:
+        if self.has_active_filters():
+            return super().paginate_queryset(queryset, page_size)
+
+        return paginate_ids(self.curated_ids, page_size, self.request, self.page_kwarg)
+
+    def get_objects_count(self) -> tuple[int, bool]:
+        if self.has_active_filters():
+            return super().get_objects_count()
+        return len(self.curated_ids), True
+
+    def has_active_filters(self) -> bool:
+        if not self.filterset.is_bound:
+            return False
+        if not self.filterset.is_valid():
+            return True
+        return any(
+            value not in (None, "", [])
+            for value in self.filterset.form.cleaned_data.values()
+        )
+
 
 class AllMoviesView(FilteredListView):
-    """All movies view"""
+    """
+    All movies view.
+    Filters supported by the in-memory indexes are answered by them, so only
+    movies of the current page are fetched by ids.
+    """
 
     page_title = "All Movies"
+    matched_ids: Sequence[int] | None = None
 
-    @cached(timeout=SESSION_LONG_CACHE_TTL)
     def get_queryset(self) -> QuerySet:
         return services.get_all_movies()
 
+    def paginate_queryset(self, queryset: QuerySet, page_size: int) -> tuple:
+        self.matched_ids = self.get_matched_ids()
+        if self.matched_ids is None:
+            return super().paginate_queryset(queryset, page_size)
+        return paginate_ids(self.matched_ids, page_size, self.request, self.page_kwarg)
+
+    def get_objects_count(self) -> tuple[int, bool]:
+        if self.matched_ids is None:
+            return super().get_objects_count()
+        return len(self.matched_ids), True
+
+    def get_matched_ids(self) -> Sequence[int] | None:
+        """
+        Ids from the bitmap index (facets and ranges) or the catalog snapshot
+        (only when range filters are given), None if neither can answer
+        the filters.
+        """
+
+        params = QueryDict(mutable=True)
+        for name in self.filterset.filters:
+            if name in self.request.GET:
+                params.setlist(name, self.request.GET.getlist(name))
+
+        for source in (get_bitmap_index(), get_catalog_snapshot()):
+            matched_ids = source.filter(params) if source is not None else None
+            if matched_ids is not None:
+                return matched_ids
+        return None
+
 
 class SearchMovieView(FilteredListView):
     """Search movie view."""
@@ -198,103 +315,117 @@ class AdvancedSearchResultView(AllMoviesView):
         return context
 
 
-class MoviesByYearView(FilteredListView):
+class MoviesByYearView(CuratedListView):
     """
     List of movies released in specific year or in the range of years.
     """
 
     page_title = "Movies by Year"
 
-    @cached(timeout=SESSION_LONG_CACHE_TTL)
-    def get_queryset(self) -> QuerySet:
+    def get_curated_ids(self) -> list[int]:
         self.page_title = f"{self.page_title} ({self.kwargs['year']})"
         try:
-            queryset = services.get_movies_list_by_years(self.kwargs["year"])
+            year = int(self.kwargs["year"])
         except ValueError:
             raise Http404()
 
-        return queryset
+        return curated.get_year_ids(year)
 
 
-class MoviesByCountryView(FilteredListView):
+class MoviesByCountryView(CuratedListView):
     """List of movies released in specific country."""
 
     page_title = "Movies by Country"
 
-    @cached(timeout=SESSION_LONG_CACHE_TTL)
-    def get_queryset(self) -> QuerySet:
+    def get_curated_ids(self) -> list[int]:
         self.page_title = f"{self.page_title} ({self.kwargs['name']})"
-        try:
-            queryset = services.get_movies_list_by_country(self.kwargs["name"])
-        except ValueError:
-            raise Http404()
+        return curated.get_country_ids(self.kwargs["name"])
 
-        return queryset
 
-
-class MoviesByGenreView(FilteredListView):
+class MoviesByGenreView(CuratedListView):
     """List of movies in specific genre."""
 
     page_title = "Movies by Genre"
 
-    @cached(timeout=SESSION_LONG_CACHE_TTL)
-    def get_queryset(self) -> QuerySet:
+    def get_curated_ids(self) -> list[int]:
         self.page_title = f"{self.page_title} ({self.kwargs['slug'].title()})"
-        try:
-            queryset = services.get_movies_list_by_genre(self.kwargs["slug"])
-        except ValueError:
-            raise Http404()
+        return curated.get_genre_ids(self.kwargs["slug"])
+
+
+class MoviesOfCollectionView(CuratedListView):
+    """Displaying a list of movies of a certain collection."""
+
+    paginate_by = 30
 
-        return queryset
+    def get_curated_ids(self) -> list[int]:
+        collection = get_object_or_404(Collection, pk=self.kwargs["pk"])
+        self.page_title = f"{collection.name} Collection"
+        return curated.get_collection_ids(collection.pk)
 
 
-class MoviesByImdbRatingView(FilteredListView):
+class MoviesByImdbRatingView(CuratedListView):
     """Top list of movies and series according to IMDB."""
 
     page_title = "Movies by IMDB Rate"
-    queryset = services.get_imdb_top()
+    curated_list = "imdb-top"
 
 
-class ClassicMoviesView(FilteredListView):
+class ClassicMoviesView(CuratedListView):
     """Top classic movies."""
 
     page_title = "TOP Classic movies"
-    queryset = services.get_top_classics(limit=300)
+    curated_list = "classic-movies"
 
 
-class PopularMoviesView(FilteredListView):
+class PopularMoviesView(CuratedListView):
     """List of popular movies."""
 
     page_title = "Popular movies"
-    queryset = services.get_popular_movies(limit=300)
+    curated_list = "popular-movies"
 
 
-class PopularSeriesView(FilteredListView):
+class PopularSeriesView(CuratedListView):
     """List of popular series."""
 
     page_title = "Popular series"
-    queryset = services.get_popular_series(limit=300)
+    curated_list = "popular-series"
 
 
-class RecentPremieresView(FilteredListView):
+class RecentPremieresView(CuratedListView):
     """Recent movie and series premieres."""
 
     page_title = "Recent premieres"
-    queryset = services.get_recent_premieres(limit=100)
+    curated_list = "recent-premieres"
 
 
-class NewMoviesSeriesView(FilteredListView):
+class NewMoviesSeriesView(CuratedListView):
     """New movies and series."""
 
     page_title = "New movies"
-    queryset = services.get_new_movies_and_series(limit=150)
+    curated_list = "new-movies-series"
+
+
+class MoviesMonthView(CuratedListView):
+    """
+    List movies of the month (or `?window=week|year`),
+    read from the materialized activity ranking.
+    """
 
+    page_title = "Movies of the {window}"
 
-class MoviesMonthView(FilteredListView):
-    """List movies of the month."""
+    def get_curated_ids(self) -> list[int]:
+        return activity.get_activity_ranked_ids(self.get_window())
+
+    def get_context_data(self, **kwargs: Any) -> dict:
+        context = super().get_context_data(**kwargs)
+        context["page_title"] = self.page_title.format(window=self.get_window().title())
+        return context
 
-    page_title = "Movies of the Month"
-    queryset = services.get_movie_of_month()
+    def get_window(self) -> str:
+        window = self.request.GET.get("window", MovieActivityRank.MONTH)
+        if window not in activity.ACTIVITY_WINDOWS:
+            raise Http404(f"Unknown window: {window}")
+        return window
 
 
 def get_filter_countries(request: HttpRequest) -> JsonResponse | None:
@@ -351,6 +482,22 @@ def get_filter_platforms(request: HttpRequest) -> JsonResponse | None:
         return JsonResponse(data, status=200)
 
 
+def get_filter_facets(request: HttpRequest) -> JsonResponse | None:
+    """Get counts of all filter values for the current filters selection."""
+
+    if request.method == "GET" and is_ajax(request=request):
+        data = {"facets": facets.get_facet_counts(request.GET)}
+        return JsonResponse(data, status=200)
+
+
+def get_autocomplete(request: HttpRequest) -> JsonResponse | None:
+    """Get movies and cast suggestions for the search input."""
+
+    if request.method == "GET" and is_ajax(request=request):
+        suggestions = search.autocomplete(request.GET.get("q", ""))
+        return JsonResponse(suggestions, status=200)
+
+
 class CommentView(View):
     """Adding comments to movies and series."""
 
@@ -390,9 +537,10 @@ class RatingView(View):
     def post(self, request: HttpRequest, pk: int) -> HttpResponse | None:
         obj: Movie = get_object_or_404(self.model, pk=pk)  # type: ignore
         if is_ajax(request=request):
+            form = RateForm(request.POST)
+            if not form.is_valid():
+                return JsonResponse({"errors": form.errors}, status=400)
             context = services.add_rate(
-                user=request.user,
-                rate_value=self.request.POST.get("rate_value", None),  # type: ignore
-                obj=obj,
+                user=request.user, rate_value=form.cleaned_data["rate_value"], obj=obj
             )
             return JsonResponse(context)
@@ -25,4 +25,39 @@ $(document).ready(function () {
       $(".body").toggleClass("body--active");
     }
   });
+
+  let suggestionsTimer;
+  $("#q").on("input", function () {
+    let searchInput = $(this);
+    clearTimeout(suggestionsTimer);
+    suggestionsTimer = setTimeout(function () {
+      getSearchSuggestions(searchInput);
+    }, 150);
+  });
 });
+
+function getSearchSuggestions(searchInput) {
+  let query = searchInput.val().trim();
+  if (!query) {
+    return;
+  }
+
+  $.ajax({
+    method: "GET",
+    url: searchInput.attr("url"),
+    data: { q: query },
+    success: function (result) {
+      let suggestions = [];
+      $.each(result.movies, function (a, b) {
+        suggestions.push($("<option>").val(b.title).text(b.year));
+      });
+      $.each(result.cast, function (a, b) {
+        suggestions.push($("<option>").val(b.full_name));
+      });
+      $("#search-suggestions").empty().append(suggestions);
+    },
+    error: function (response) {
+      console.log(response);
+    },
+  });
+}